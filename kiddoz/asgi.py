@@ -12,5 +12,11 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kiddoz.settings')
+os.environ.setdefault('DJANGO_SERVER_INTERFACE', 'asgi')  # Read by the database settings
 
 application = get_asgi_application()
+
+# Load the in-process vector search index now rather than in the first request (PRODUCT_SEARCH_BACKEND=numpy)
+from main.search import warm_up  # Imported after the app registry is set up
+
+warm_up()
@@ -41,13 +41,15 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'main.apps.MainConfig',
     # 'django_browser_reload'
 ]
 
 MIDDLEWARE = [
+    'main.middleware.ServerTimingMiddleware',  # First, so the session save is inside the timed request
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'main.middleware.TimedSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -80,6 +82,20 @@ WSGI_APPLICATION = 'kiddoz.wsgi.application'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
 # RUN THIS CODE: psql -U admin -d kiddoz_db -h localhost -p 5432
+# Connection reuse:
+#   DB_POOL=true     — psycopg3 connection pool shared by the threads of each process (DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE).
+#                      This is the way to reuse connections under ASGI.
+#   DB_POOL=false    — one persistent connection per thread, closed after DB_CONN_MAX_AGE seconds (0 = per request).
+#                      Under ASGI the sync ORM work of each request runs on its own thread, so persistent connections
+#                      are never reused and pile up until Postgres runs out; the default there is 0.
+#                      WSGI servers and management commands default to 60.
+# Both check a reused connection is still alive before handing it out.
+SERVED_BY_ASGI = os.getenv('DJANGO_SERVER_INTERFACE') == 'asgi'  # Set by kiddoz/asgi.py
+DB_POOL = os.getenv('DB_POOL', 'false').lower() == 'true'
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 0 if SERVED_BY_ASGI else 60))
+if DB_POOL:
+    from psycopg_pool import ConnectionPool
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -88,6 +104,17 @@ DATABASES = {
         'PASSWORD': 'admin',
         'HOST': 'localhost',
         'PORT': '5432',
+        'CONN_MAX_AGE': 0 if DB_POOL else DB_CONN_MAX_AGE,  # The pool manages lifetimes itself
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'pool': {
+                'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+                'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 20)),
+                'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+                'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 300)),
+                'check': ConnectionPool.check_connection,
+            },
+        } if DB_POOL else {},
     }
 }
 
@@ -133,6 +160,92 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# OpenAI embeddings
+# https://platform.openai.com/docs/guides/embeddings
+
+# Embedding backend: 'openai' (EMBEDDING_MODEL through the API) or 'local' (deterministic hashed n-gram
+# projection, NumPy-only, for offline runs and benchmarks — the catalogue must be embedded with the same backend)
+EMBEDDING_PROVIDER = os.getenv('EMBEDDING_PROVIDER', 'openai')
+EMBEDDING_MODEL = 'text-embedding-3-small'
+EMBEDDING_DIMENSIONS = 1536
+
+# Shortened half-precision copy of the embeddings (Product.embedding_compact), and the column searched by query_products:
+#   'embedding'         — full 1536-dim float32 vectors
+#   'embedding_compact' — first main.models.EMBEDDING_COMPACT_DIMENSIONS dims, re-normalised, stored as halfvec
+EMBEDDING_SEARCH_FIELD = os.getenv('EMBEDDING_SEARCH_FIELD', 'embedding')
+
+# Query embeddings are cached in-process (LRU) and in the embedding_cache table
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', 1024))
+EMBEDDING_CACHE_PERSISTENT_MAX_ENTRIES = int(os.getenv('EMBEDDING_CACHE_PERSISTENT_MAX_ENTRIES', 50000))
+# Cache misses per worker between evictions of the embedding_cache table, 0 leaves it to `evict_embedding_cache`
+EMBEDDING_CACHE_EVICT_EVERY = int(os.getenv('EMBEDDING_CACHE_EVICT_EVERY', 100))
+
+# pgvector HNSW index on Product.embedding
+# https://github.com/pgvector/pgvector#hnsw
+
+HNSW_M = int(os.getenv('HNSW_M', 16))                              # build: links per node
+HNSW_EF_CONSTRUCTION = int(os.getenv('HNSW_EF_CONSTRUCTION', 64))  # build: candidate list size
+HNSW_EF_SEARCH = int(os.getenv('HNSW_EF_SEARCH', 100))             # query: candidate list size, higher = better recall
+# query: keep scanning the index until the age, gender and price filters leave k rows (pgvector 0.8+).
+# Without it the filters only see ef_search candidates and selective queries come back short.
+# 'relaxed_order' (fastest), 'strict_order', or '' to disable.
+HNSW_ITERATIVE_SCAN = os.getenv('HNSW_ITERATIVE_SCAN', 'relaxed_order')
+
+# Similarity search backend for query_products:
+#   'pgvector' — cosine ordering inside Postgres
+#   'numpy'    — in-process matrix of all active embeddings, reloaded when the catalogue changes
+#   'hybrid'   — cosine and full-text (name, brand, categories, usage_type) rankings fused with reciprocal rank fusion
+PRODUCT_SEARCH_BACKEND = os.getenv('PRODUCT_SEARCH_BACKEND', 'pgvector')
+HYBRID_CANDIDATES = int(os.getenv('HYBRID_CANDIDATES', 50))  # rows taken from each ranking before fusion
+HYBRID_RRF_K = int(os.getenv('HYBRID_RRF_K', 60))            # reciprocal rank fusion constant
+VECTOR_SEARCH_REFRESH_SECONDS = int(os.getenv('VECTOR_SEARCH_REFRESH_SECONDS', 60))
+
+# Written by `python manage.py export_embedding_snapshot`, and after every scraper, infer_attributes, embed_products and compact_embeddings run.
+# Written by `python manage.py export_embedding_snapshot` (and after every infer_attributes run).
+VECTOR_SNAPSHOT_DIR = os.getenv('VECTOR_SNAPSHOT_DIR', '')
+VECTOR_SNAPSHOT_KEEP = int(os.getenv('VECTOR_SNAPSHOT_KEEP', 3))
+
+# In-process cache of recommendation results, invalidated when the catalogue generation is bumped
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', 2048))
+RESULT_CACHE_GENERATION_SECONDS = float(os.getenv('RESULT_CACHE_GENERATION_SECONDS', 5))
+
+# Constraint on the chat replies: 'json_schema' (structured outputs matching the response/options/results
+# contract), 'json_object' (JSON mode) or 'text'. Replies that still fail to parse are repaired locally first.
+GPT_RESPONSE_FORMAT = os.getenv('GPT_RESPONSE_FORMAT', 'json_schema')
+
+# Speculative prefetch: when the router shows options whose follow-ups are known profiles (the guided
+# budget list), their results are computed in the background so the click is served from the result cache.
+# ASGI only: under WSGI (and runserver) each async view runs in an event loop that is torn down with the
+# response, which cancels the background work, so prefetch is always off there.
+PREFETCH_ENABLED = SERVED_BY_ASGI and os.getenv('PREFETCH_ENABLED', 'true').lower() == 'true'
+PREFETCH_MAX_PER_SESSION = int(os.getenv('PREFETCH_MAX_PER_SESSION', 10))
+PREFETCH_CONCURRENCY = int(os.getenv('PREFETCH_CONCURRENCY', 4))
+PREFETCH_DELAY_SECONDS = float(os.getenv('PREFETCH_DELAY_SECONDS', 0.05))
+
+# Prompt window of long conversations: the system prompt, a summary of older turns and the last
+# CONVERSATION_KEEP_TURNS messages verbatim, within CONVERSATION_TOKEN_BUDGET prompt tokens
+CONVERSATION_TOKEN_BUDGET = int(os.getenv('CONVERSATION_TOKEN_BUDGET', 4000))
+CONVERSATION_KEEP_TURNS = int(os.getenv('CONVERSATION_KEEP_TURNS', 8))
+
+# Per-stage latency spans (gpt, json_repair, embedding, search, session) are logged to the main.timing logger,
+# aggregated at /metrics/ and, when enabled, sent to the browser as a Server-Timing header
+SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'true').lower() == 'true'
+
+# Re-ranking of the top RERANK_CANDIDATES retrieval results by distance between their numeric attributes
+# and the requested profile. The final score is RERANK_ALPHA * retrieval score + (1 - RERANK_ALPHA) * closeness.
+RERANK_ENABLED = os.getenv('RERANK_ENABLED', 'false').lower() == 'true'
+RERANK_CANDIDATES = int(os.getenv('RERANK_CANDIDATES', 200))
+RERANK_ALPHA = float(os.getenv('RERANK_ALPHA', 0.7))
+RERANK_WEIGHTS = {
+    'giftability': 1.0,
+    'educational_value': 1.0,
+    'durability': 1.0,
+    'value_for_money': 1.0,
+    'safety_perception': 1.5,
+    'sensitivity_level': 1.0,
+    'portability': 0.5,
+}
+
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
@@ -156,6 +269,11 @@ LOGGING = {
         },
     },
     'handlers': {
+        'console': {
+            'level': 'INFO',
+            'class': 'logging.StreamHandler',
+            'formatter': 'verbose',
+        },
         'scraper_file': {
             'level': 'INFO',
             'class': 'logging.FileHandler',
@@ -164,6 +282,11 @@ LOGGING = {
         },
     },
     'loggers': {
+        'main.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
         'KiddozScraper': {
             'handlers': ['scraper_file'],
             'level': 'INFO',
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kiddoz.settings')
 
 application = get_wsgi_application()
+
+# Load the in-process vector search index now rather than in the first request (PRODUCT_SEARCH_BACKEND=numpy)
+from main.search import warm_up  # Imported after the app registry is set up
+
+warm_up()
@@ -0,0 +1,104 @@
+import json
+import logging
+from django.conf import settings
+
+try:
+    import tiktoken
+except ImportError:  # Fall back to a character estimate, close enough for budgeting
+    tiktoken = None
+
+
+MESSAGE_OVERHEAD_TOKENS = 4  # Role and separators the chat format adds to every message
+
+# Profile attributes that carry the shopper's constraints into the summary
+SUMMARY_ATTRIBUTES = ["age_suitability", "gender", "maximum_price", "categories", "brand", "usage_type", "size", "color_options"]
+
+# (statements, characters per statement) of the summary, tried in turn until the window fits the budget
+SUMMARY_SIZES = [(12, 240), (6, 160), (3, 80), (0, 0)]
+
+logger = logging.getLogger(__name__)
+
+encoders = {}
+
+
+def count_tokens(text, model="gpt-4o"):
+    if tiktoken is None:
+        return len(text) // 4 + 1
+    if model not in encoders:
+        try:
+            encoders[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoders[model] = tiktoken.get_encoding("o200k_base")
+    return len(encoders[model].encode(text))
+
+
+def message_tokens(messages, model="gpt-4o"):
+    return sum(MESSAGE_OVERHEAD_TOKENS + count_tokens(message["content"] or "", model) for message in messages)
+
+
+def parse_profile(content):
+    """
+    The product profile of an assistant turn that logged `results`, or None for ordinary text.
+    """
+    if not content or not content.startswith(("{", "[")):
+        return None
+    try:
+        profile = json.loads(content)
+    except json.JSONDecodeError:
+        return None
+    profile = profile[0] if isinstance(profile, list) and profile else profile
+    return profile if isinstance(profile, dict) and "age_suitability" in profile else None
+
+
+def summarise_turns(turns, max_statements=12, max_chars=240):
+    """
+    Collapses older turns into one system message with what the shopper asked for and the constraints
+    of the latest product profile. Assistant prose is dropped, the profile JSON is reduced to its filters.
+    """
+    statements = []
+    profile = None
+    for turn in turns:
+        if turn["role"] == "user":
+            statements.append(turn["content"][:max_chars])
+        elif (parsed := parse_profile(turn["content"])) is not None:
+            profile = parsed
+
+    lines = ["Summary of the earlier conversation."]
+    if statements and max_statements:
+        lines.append("The shopper said: " + " | ".join(statements[-max_statements:]))
+    if profile:
+        constraints = {name: profile[name] for name in SUMMARY_ATTRIBUTES if profile.get(name) not in (None, "", [])}
+        lines.append("Last recommended product profile: " + json.dumps(constraints, separators=(",", ":")))
+    return {"role": "system", "content": "\n".join(lines)}
+
+
+def conversation_window(system_message, turns, budget=None, keep_turns=None, model="gpt-4o"):
+    """
+    The messages to send for a conversation within a prompt token budget: the system prompt, a summary
+    of the older turns, and the last `keep_turns` turns verbatim. Short conversations are sent whole.
+    The verbatim tail is never cut below `keep_turns`; the summary is shortened instead, and if even the
+    shortest summary does not fit the window goes over budget, with a warning.
+    @param budget: Prompt token budget (CONVERSATION_TOKEN_BUDGET).
+    @param keep_turns: Number of most recent messages always kept verbatim (CONVERSATION_KEEP_TURNS).
+    @return: Tuple of the messages and their token count.
+    """
+    budget = budget or settings.CONVERSATION_TOKEN_BUDGET
+    keep_turns = keep_turns or settings.CONVERSATION_KEEP_TURNS
+
+    messages = [system_message] + turns
+    tokens = message_tokens(messages, model)
+    if tokens <= budget or len(turns) <= keep_turns:
+        return messages, tokens
+
+    # Summarise everything before the verbatim tail, with fewer and shorter shopper statements until it fits
+    older, recent = turns[:-keep_turns], turns[-keep_turns:]
+    fixed = message_tokens([system_message] + recent, model)
+    for max_statements, max_chars in SUMMARY_SIZES:
+        summary = summarise_turns(older, max_statements, max_chars)
+        tokens = fixed + message_tokens([summary], model)
+        if tokens <= budget:
+            break
+    else:
+        logger.warning("Conversation window of %d tokens exceeds the %d token budget", tokens, budget)
+
+    return [system_message, summary] + recent, tokens
@@ -0,0 +1,102 @@
+import hashlib, json
+
+from .models import Conversation, ConversationTurn
+
+
+# Bytes moved per turn, by the conversation log and by the session itself
+storage_stats = {
+    "turns_written": 0, "bytes_written": 0,
+    "loads": 0, "bytes_read": 0,
+    "session_reads": 0, "session_bytes_read": 0,
+    "session_writes": 0, "session_bytes_written": 0,
+}
+
+
+def prompt_version(message):
+    """
+    Short content hash of a system message, stored instead of the message itself.
+    """
+    return hashlib.sha256(message["content"].encode("utf-8")).hexdigest()[:16]
+
+
+def compact_content(content):
+    """
+    Turns are stored as text; result profiles and other structured content as compact JSON.
+    """
+    if isinstance(content, str):
+        return content
+    return json.dumps(content, separators=(",", ":"), ensure_ascii=False)
+
+
+async def start_conversation(session, system_prompt):
+    """
+    Starts a new conversation log and points the session at it.
+    """
+    conversation = await Conversation.objects.acreate(system_prompt=system_prompt)
+    await session.aset("conversation_id", conversation.pk)
+    return conversation.pk
+
+
+async def append_turns(session, system_prompt, *turns):
+    """
+    Appends (role, content) turns to the session's conversation. Only the new rows are written.
+    """
+    conversation_id = await session.aget("conversation_id")
+    if conversation_id is None:
+        conversation_id = await start_conversation(session, system_prompt)
+
+    rows = [
+        ConversationTurn(conversation_id=conversation_id, role=role, content=compact_content(content))
+        for role, content in turns
+    ]
+    await ConversationTurn.objects.abulk_create(rows)
+    storage_stats["turns_written"] += len(rows)
+    storage_stats["bytes_written"] += sum(len(row.content.encode("utf-8")) for row in rows)
+
+
+async def load_turns(session):
+    """
+    The system prompt version and the (role, content) messages of the session's conversation, oldest first.
+    """
+    conversation_id = await session.aget("conversation_id")
+    if conversation_id is None:
+        return None, []
+
+    system_prompt = await Conversation.objects.filter(pk=conversation_id).values_list("system_prompt", flat=True).afirst()
+    turns = [
+        {"role": role, "content": content}
+        async for role, content in ConversationTurn.objects.filter(conversation_id=conversation_id).order_by("id").values_list("role", "content")
+    ]
+    storage_stats["loads"] += 1
+    storage_stats["bytes_read"] += sum(len(turn["content"].encode("utf-8")) for turn in turns)
+    return system_prompt, turns
+
+
+def record_session_size(session):
+    """
+    Counts the encoded size of a session that was read and, if it changed, written during the request.
+    """
+    if not session.accessed:
+        return
+    size = len(session.encode(dict(session.items())).encode("utf-8"))
+    storage_stats["session_reads"] += 1
+    storage_stats["session_bytes_read"] += size
+    if session.modified:
+        storage_stats["session_writes"] += 1
+        storage_stats["session_bytes_written"] += size
+
+
+def storage_stats_summary():
+    """
+    Totals plus the average bytes moved per turn.
+    """
+    def per(total, count):
+        return round(total / count, 1) if count else 0.0
+
+    return {
+        **storage_stats,
+        "avg_turn_bytes_written": per(storage_stats["bytes_written"], storage_stats["turns_written"]),
+        "avg_conversation_bytes_read": per(storage_stats["bytes_read"], storage_stats["loads"]),
+        "avg_session_bytes_read": per(storage_stats["session_bytes_read"], storage_stats["session_reads"]),
+        "avg_session_bytes_written": per(storage_stats["session_bytes_written"], storage_stats["session_writes"]),
+    }
@@ -0,0 +1,93 @@
+import hashlib, math, os, re
+from collections import Counter
+from functools import lru_cache
+import numpy as np
+from django.conf import settings
+from openai import AsyncOpenAI, OpenAI
+
+
+class OpenAIEmbeddingProvider:
+    """
+    Embeds text with the OpenAI embeddings API (EMBEDDING_MODEL).
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.client = None
+        self.async_client = None
+
+    def embed(self, text, dimensions):
+        if self.client is None:
+            self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        response = self.client.embeddings.create(input=text, model=self.model, dimensions=dimensions)
+        return response.data[0].embedding
+
+    async def aembed(self, text, dimensions):
+        if self.async_client is None:
+            self.async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        response = await self.async_client.embeddings.create(input=text, model=self.model, dimensions=dimensions)
+        return response.data[0].embedding
+
+
+class HashingEmbeddingProvider:
+    """
+    Deterministic, CPU-only embeddings for offline runs, benchmarks and load tests.
+
+    Words, word bigrams and character trigrams are hashed, every feature seeds its own Gaussian
+    random projection vector, and the vectors are summed with sublinear term-frequency weights and
+    L2-normalised. Because each projection vector is drawn sequentially from its own generator, the
+    first n values of a D-dim embedding are the n-dim embedding before normalisation, so shortening
+    by truncation (embedding_compact) stays consistent with the OpenAI vectors' behaviour.
+
+    The vectors only live in their own space: the catalogue has to be embedded with the same provider.
+    """
+
+    model = "local-hashing-v1"
+
+    @staticmethod
+    def features(text):
+        words = re.findall(r"\w+", text.lower())
+        features = Counter(f"w:{word}" for word in words)
+        features.update(f"b:{first} {second}" for first, second in zip(words, words[1:]))
+        for word in words:
+            padded = f" {word} "
+            features.update(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return features
+
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def projection(feature, dimensions):
+        seed = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+        return np.random.default_rng(seed).standard_normal(dimensions, dtype=np.float32)
+
+    def embed(self, text, dimensions):
+        features = self.features(text)
+        vector = np.zeros(dimensions, dtype=np.float32)
+        for feature, count in features.items():
+            vector += (1.0 + math.log(count)) * self.projection(feature, dimensions)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    async def aembed(self, text, dimensions):
+        # Pure NumPy work of a few milliseconds, cheaper than a thread hop
+        return self.embed(text, dimensions)
+
+
+PROVIDERS = {
+    "openai": lambda: OpenAIEmbeddingProvider(settings.EMBEDDING_MODEL),
+    "local": HashingEmbeddingProvider,
+}
+
+providers = {}
+
+
+def get_embedding_provider(name=None):
+    """
+    Returns the embedding provider selected by EMBEDDING_PROVIDER ('openai' or 'local').
+    """
+    name = name or settings.EMBEDDING_PROVIDER
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown EMBEDDING_PROVIDER {name!r}, expected one of {sorted(PROVIDERS)}")
+    if name not in providers:
+        providers[name] = PROVIDERS[name]()
+    return providers[name]
@@ -0,0 +1,118 @@
+import hashlib, re
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .cache import LRUCache
+from .embedding_providers import get_embedding_provider
+from .models import EmbeddingCacheEntry
+
+# First tier: embeddings kept in this process
+memory_cache = LRUCache(max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES)
+
+# Second tier: counters for the embedding_cache table shared by every process
+persistent_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+# Rows this process inserted since it last evicted, eviction runs every EMBEDDING_CACHE_EVICT_EVERY inserts
+eviction_state = {"inserts": 0}
+
+
+def normalise_embedding_text(text):
+    """
+    Collapses whitespace so prompts that only differ in indentation or line breaks share one embedding.
+    """
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def shorten_embedding(embedding, dimensions):
+    """
+    Shortens a text-embedding-3 vector the same way the API's `dimensions` parameter does:
+    keep the first `dimensions` values and re-normalise to unit length.
+    """
+    vector = np.asarray(embedding, dtype=np.float32)[:dimensions]
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).tolist()
+
+
+def embedding_cache_key(model, dimensions, text):
+    """
+    Hash of everything that determines an embedding: the model, the number of dimensions and the text.
+    """
+    return hashlib.sha256(f"{model}\x00{dimensions}\x00{text}".encode("utf-8")).hexdigest()
+
+
+async def get_embedding(text, dimensions=None):
+    """
+    Returns the embedding of `text`, looking in the in-process LRU first, then in the embedding_cache
+    table, and only calling the embedding provider (EMBEDDING_PROVIDER) when neither has it.
+    @param text: Text to embed.
+    @return: The embedding as a list of floats.
+    """
+    provider = get_embedding_provider()
+    model = provider.model
+    dimensions = dimensions or settings.EMBEDDING_DIMENSIONS
+    text = normalise_embedding_text(text)
+    key = embedding_cache_key(model, dimensions, text)
+
+    embedding = memory_cache.get(key)
+    if embedding is not None:
+        return embedding
+
+    embedding = await EmbeddingCacheEntry.objects.filter(key=key).values_list("embedding", flat=True).afirst()
+    if embedding is not None:
+        persistent_stats["hits"] += 1
+        embedding = list(map(float, embedding))
+        await EmbeddingCacheEntry.objects.filter(key=key).aupdate(last_used_at=timezone.now())
+        memory_cache.set(key, embedding)
+        return embedding
+
+    persistent_stats["misses"] += 1
+    embedding = await provider.aembed(text, dimensions)
+
+    await EmbeddingCacheEntry.objects.aupdate_or_create(
+        key=key,
+        defaults={"model": model, "dimensions": dimensions, "embedding": embedding, "last_used_at": timezone.now()},
+    )
+    eviction_state["inserts"] += 1
+    if settings.EMBEDDING_CACHE_EVICT_EVERY and eviction_state["inserts"] >= settings.EMBEDDING_CACHE_EVICT_EVERY:
+        eviction_state["inserts"] = 0
+        await evict_persistent_entries()
+    memory_cache.set(key, embedding)
+    return embedding
+
+
+async def evict_persistent_entries():
+    """
+    Keeps the embedding_cache table at EMBEDDING_CACHE_PERSISTENT_MAX_ENTRIES rows by deleting the least recently used ones.
+    Both queries walk the last_used_at index. Between runs the table may grow past the limit by a few inserts per worker.
+    @return: Number of rows deleted.
+    """
+    max_entries = settings.EMBEDDING_CACHE_PERSISTENT_MAX_ENTRIES
+    cutoff = await EmbeddingCacheEntry.objects.order_by("-last_used_at").values_list(
+        "last_used_at", flat=True
+    )[max_entries - 1:max_entries].afirst()
+    if cutoff is None:
+        return 0
+
+    deleted, _ = await EmbeddingCacheEntry.objects.filter(last_used_at__lt=cutoff).adelete()
+    persistent_stats["evictions"] += deleted
+    return deleted
+
+
+def embedding_cache_stats():
+    """
+    Hit-rate counters of both cache tiers.
+    """
+    memory = memory_cache.stats()
+    lookups = persistent_stats["hits"] + persistent_stats["misses"]
+    return {
+        "memory": memory,
+        "persistent": {
+            **persistent_stats,
+            "hit_rate": round(persistent_stats["hits"] / lookups, 4) if lookups else 0.0,
+        },
+        # Share of all lookups that never reached the embedding provider
+        "overall_hit_rate": round(
+            1 - persistent_stats["misses"] / (memory["hits"] + memory["misses"]), 4
+        ) if memory["hits"] + memory["misses"] else 0.0,
+    }
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import random
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main.context_window import conversation_window, message_tokens
+from main.views import SYSTEM_MESSAGE, client
+
+
+USER_MESSAGES = [
+    "I need a gift for my niece, she is turning 4",
+    "Something educational would be nice",
+    "Keep it under Rs. 8,000 please",
+    "Does it come in pink?",
+    "What about something for outdoor play instead?",
+    "She loves animals",
+    "Actually make the budget Rs. 12,000",
+    "Is there anything waterproof?",
+    "Show me some Lego options",
+    "What about puzzles?",
+]
+
+
+def synthetic_turns(n, seed):
+    """
+    A free-flow conversation of `n` exchanges, each assistant reply carrying a full product profile
+    the way add_message logs it.
+    """
+    rng = random.Random(seed)
+    turns = []
+    for i in range(n):
+        profile = {
+            "age_suitability": "3-5 years", "gender": "female", "maximum_price": rng.choice([8000, 12000]),
+            "giftability": 9, "educational_value": rng.randint(5, 9), "durability": 7, "value_for_money": 7,
+            "safety_perception": 9, "seasonal_use": [], "sensitivity_level": 5, "waterproof": rng.random() < 0.3,
+            "portability": 6, "design_features": ["colourful", "compact"], "package_quantity": 1,
+            "usage_type": "learning through play", "material_origin": "plastic", "chemical_safety": "non-toxic",
+            "size": None, "weight_range": None, "count": None, "color_options": ["Pink"], "brand": None,
+            "categories": ["Toys", "Educational"],
+        }
+        turns.append({"role": "user", "content": USER_MESSAGES[i % len(USER_MESSAGES)]})
+        turns.append({"role": "assistant", "content": "Here is the ideal product profile based on what you told me."})
+        turns.append({"role": "assistant", "content": json.dumps(profile, separators=(",", ":"))})
+    return turns
+
+
+async def measure_latencies(prompts):
+    """
+    Times one chat completion for the full and the windowed prompt of every turn, in a single event loop.
+    """
+    latencies = []
+    for full, window in prompts:
+        pair = []
+        for messages in (full, window):
+            start = time.perf_counter()
+            await client.chat.completions.create(model="gpt-4o", messages=messages, max_tokens=2048)
+            pair.append(time.perf_counter() - start)
+        latencies.append(pair)
+    return latencies
+
+
+class Command(BaseCommand):
+    """
+    Usage: python manage.py benchmark_conversation_window --turns 20 [--live]
+    """
+
+    help = "Compares prompt size (and, with --live, latency) of the full history and the token-budgeted window over a long conversation."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--turns", type=int, default=20, help="Number of shopper turns in the conversation.")
+        parser.add_argument("--budget", type=int, default=settings.CONVERSATION_TOKEN_BUDGET)
+        parser.add_argument("--keep-turns", type=int, default=settings.CONVERSATION_KEEP_TURNS)
+        parser.add_argument("--live", action="store_true", help="Also time a chat completion per turn (point OPENAI_BASE_URL at the mock server for a dry run).")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        turns = synthetic_turns(options["turns"], options["seed"])
+
+        header = f"{'turn':>4} {'full tokens':>12} {'window tokens':>14} {'saved':>6}"
+        if options["live"]:
+            header += f" {'full latency':>13} {'window latency':>15}"
+        self.stdout.write(header)
+
+        prompts, rows = [], []
+        for turn in range(1, options["turns"] + 1):
+            # Messages sent when the shopper's turn-th message has just been logged
+            history = turns[:3 * (turn - 1) + 1]
+            full = [SYSTEM_MESSAGE] + history
+            window, window_tokens = conversation_window(
+                SYSTEM_MESSAGE, history, budget=options["budget"], keep_turns=options["keep_turns"],
+            )
+            prompts.append((full, window))
+            rows.append((turn, message_tokens(full), window_tokens))
+
+        latencies = asyncio.run(measure_latencies(prompts)) if options["live"] else [None] * len(rows)
+
+        for (turn, full_tokens, window_tokens), latency in zip(rows, latencies):
+            line = f"{turn:>4} {full_tokens:>12} {window_tokens:>14} {1 - window_tokens / full_tokens:>6.0%}"
+            if latency:
+                line += f" {latency[0] * 1000:>11.0f}ms {latency[1] * 1000:>13.0f}ms"
+            self.stdout.write(line)
+
+        full_total = sum(row[1] for row in rows)
+        window_total = sum(row[2] for row in rows)
+        self.stdout.write(self.style.SUCCESS(
+            f"Prompt tokens over {options['turns']} turns: full {full_total}, window {window_total} "
+            f"({1 - window_total / full_total:.0%} fewer)"
+        ))
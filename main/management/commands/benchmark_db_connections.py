@@ -0,0 +1,115 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from main.models import CatalogGeneration, Conversation, ConversationTurn, Product
+
+
+def chat_turn_queries(session_key):
+    """
+    The database work of one /chat/ turn: load the session, read the catalogue generation,
+    append a turn to the conversation log, read the log back and save the session.
+    """
+    session = SessionStore(session_key=session_key)
+    conversation_id = session.get("conversation_id")
+    CatalogGeneration.current()
+    ConversationTurn.objects.create(conversation_id=conversation_id, role="user", content="benchmark")
+    list(ConversationTurn.objects.filter(conversation_id=conversation_id).values_list("role", "content"))
+    session["turns"] = session.get("turns", 0) + 1
+    session.save()
+
+
+def upsert(product):
+    """
+    The scraper's update_or_create for an existing product, rolled back so the catalogue is left untouched.
+    """
+    with transaction.atomic():
+        Product.objects.update_or_create(name=product["name"], defaults={**product, "updated_at": timezone.now()})
+        transaction.set_rollback(True)
+
+
+def connection_mode():
+    database = settings.DATABASES["default"]
+    if database.get("OPTIONS", {}).get("pool"):
+        pool = database["OPTIONS"]["pool"]
+        return f"psycopg pool (min {pool['min_size']}, max {pool['max_size']})"
+    return f"CONN_MAX_AGE={database.get('CONN_MAX_AGE', 0)}"
+
+
+ASGI_NOTE = (
+    "Note: this command reuses one thread per worker, as WSGI does. Under ASGI (kiddoz/asgi.py) each request's "
+    "ORM work runs on its own thread, so CONN_MAX_AGE > 0 never reuses a connection and only piles them up; "
+    "ASGI defaults to CONN_MAX_AGE=0, use DB_POOL=true there."
+)
+
+
+class Command(BaseCommand):
+    """
+    Usage: python manage.py benchmark_db_connections --requests 500 --upserts 500 --threads 5
+    Run once per setting to compare, e.g. DB_CONN_MAX_AGE=0, DB_CONN_MAX_AGE=60 and DB_POOL=true.
+    DB_CONN_MAX_AGE=60 only applies to WSGI servers and management commands; DB_POOL=true is the ASGI setting.
+    """
+
+    help = "Measures the database time of a /chat/ turn and the scraper upsert rate under the current connection settings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=300, help="Number of simulated /chat/ turns.")
+        parser.add_argument("--upserts", type=int, default=300, help="Number of scraper upserts.")
+        parser.add_argument("--threads", type=int, default=5, help="Scraper threads, as in KiddozScraper.scrape_products.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Connection mode: {connection_mode()}")
+        if not settings.DATABASES["default"].get("OPTIONS", {}).get("pool") and settings.DATABASES["default"].get("CONN_MAX_AGE"):
+            self.stdout.write(self.style.WARNING(ASGI_NOTE))
+        self.stdout.write("")
+
+        # /chat/: every turn runs inside the request signals, which is where Django closes or returns connections
+        conversation = Conversation.objects.create(system_prompt="benchmark")
+        session = SessionStore()
+        session["conversation_id"] = conversation.pk
+        session.create()
+
+        latencies = []
+        for _ in range(options["requests"]):
+            start = time.perf_counter()
+            request_started.send(sender=self.__class__)
+            chat_turn_queries(session.session_key)
+            request_finished.send(sender=self.__class__)
+            latencies.append(time.perf_counter() - start)
+
+        conversation.delete()
+        session.delete()
+
+        latencies.sort()
+        self.stdout.write(
+            f"/chat/ DB time  p50 {statistics.median(latencies) * 1000:6.2f}ms | "
+            f"p95 {latencies[int(0.95 * (len(latencies) - 1))] * 1000:6.2f}ms | "
+            f"mean {statistics.mean(latencies) * 1000:6.2f}ms"
+        )
+
+        # Scraper: worker threads upserting, each releasing its connection after a unit of work
+        fields = ["name", "url", "brand", "current_price", "original_price", "in_stock", "image_urls", "primary_image", "is_active"]
+        products = list(Product.objects.values(*fields)[:options["upserts"]])
+        if not products:
+            self.stdout.write(self.style.WARNING("No products to upsert — skipping the scraper benchmark."))
+            return
+        products = (products * (options["upserts"] // len(products) + 1))[:options["upserts"]]
+
+        def work(product):
+            try:
+                upsert(product)
+            finally:
+                close_old_connections()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["threads"]) as executor:
+            list(executor.map(work, products))
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(f"Scraper upserts {len(products) / elapsed:8.1f}/s with {options['threads']} threads")
@@ -0,0 +1,90 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from pgvector import HalfVector
+from pgvector.django import CosineDistance
+
+from main.embeddings import shorten_embedding
+from main.models import EMBEDDING_COMPACT_DIMENSIONS, Product
+
+
+def top_ids(product, distance, k):
+    """
+    The same filtered cosine ordering as query_products, for the given distance expression.
+    """
+    return list(
+        Product.objects.active().annotate(
+            similarity=distance
+        ).filter(
+            age_suitability=product.age_suitability,
+        ).filter(
+            Q(gender="unisex") | Q(gender=product.gender)
+        ).order_by("similarity").values_list("id", flat=True)[:k]
+    )
+
+
+def relation_size(name):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_relation_size(%s::regclass)", [name])
+        return cursor.fetchone()[0]
+
+
+def column_size(column):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COALESCE(SUM(pg_column_size({column})), 0) FROM {Product._meta.db_table}")
+        return cursor.fetchone()[0]
+
+
+class Command(BaseCommand):
+    """
+    Usage: python manage.py benchmark_embedding_storage --queries 200
+    """
+
+    help = "Compares storage size, query latency and top-10 overlap of the full and compact embedding columns."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queries", type=int, default=100, help="Number of catalogue products used as queries.")
+        parser.add_argument("--k", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        ids = list(Product.objects.active().exclude(embedding=None).exclude(embedding_compact=None).values_list("id", flat=True))
+        if not ids:
+            self.stdout.write(self.style.WARNING("No products with both embeddings — run compact_embeddings first."))
+            return
+
+        random.seed(options["seed"])
+        sample = random.sample(ids, min(options["queries"], len(ids)))
+        queries = list(Product.objects.filter(id__in=sample).only("id", "embedding", "age_suitability", "gender"))
+        k, dimensions = options["k"], EMBEDDING_COMPACT_DIMENSIONS
+
+        full_latencies, compact_latencies, overlaps = [], [], []
+        for product in queries:
+            start = time.perf_counter()
+            full = top_ids(product, CosineDistance("embedding", product.embedding), k)
+            full_latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            compact = top_ids(
+                product, CosineDistance("embedding_compact", HalfVector(shorten_embedding(product.embedding, dimensions))), k
+            )
+            compact_latencies.append(time.perf_counter() - start)
+
+            if full:
+                overlaps.append(len(set(full) & set(compact)) / len(full))
+
+        self.stdout.write(f"{len(queries)} queries, k={k}, compact dimensions={dimensions}\n")
+        self.stdout.write(f"{'':<10} {'column':>10} {'index':>10} {'mean query':>12} {'p95 query':>11}")
+        for label, column, index, latencies in (
+            ("full", "embedding", "product_embedding_hnsw_idx", full_latencies),
+            ("compact", "embedding_compact", "product_emb_compact_hnsw_idx", compact_latencies),
+        ):
+            latencies = sorted(latencies)
+            self.stdout.write(
+                f"{label:<10} {column_size(column) / 1024 ** 2:>8.1f}MB {relation_size(index) / 1024 ** 2:>8.1f}MB "
+                f"{statistics.mean(latencies) * 1000:>10.2f}ms {latencies[int(0.95 * (len(latencies) - 1))] * 1000:>9.2f}ms"
+            )
+        self.stdout.write(f"\nTop-{k} overlap of compact with full: {statistics.mean(overlaps) if overlaps else 0:.3f}")
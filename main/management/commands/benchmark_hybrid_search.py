@@ -0,0 +1,109 @@
+import asyncio
+import random
+import statistics
+import time
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+
+from main.embeddings import get_embedding
+from main.models import Product
+from main.search import hybrid_search
+from main.views import embedding_text, pgvector_search
+
+
+def product_profile(product):
+    """
+    Builds the product profile GPT-4o would return for a shopper who wants exactly this product.
+    """
+    return {
+        "age_suitability": product.age_suitability,
+        "gender": product.gender,
+        "maximum_price": product.current_price,
+        "giftability": float(product.giftability),
+        "educational_value": float(product.educational_value),
+        "durability": float(product.durability),
+        "value_for_money": float(product.value_for_money),
+        "safety_perception": float(product.safety_perception),
+        "seasonal_use": product.seasonal_use,
+        "sensitivity_level": float(product.sensitivity_level),
+        "waterproof": product.waterproof,
+        "portability": float(product.portability),
+        "design_features": product.design_features,
+        "package_quantity": product.package_quantity,
+        "usage_type": product.usage_type,
+        "material_origin": product.material_origin,
+        "chemical_safety": product.chemical_safety,
+        "size": product.size,
+        "weight_range": product.weight_range,
+        "count": product.count,
+        "brand": product.brand,
+        "color_options": product.color_options,
+        "categories": product.categories,
+    }
+
+
+async def run_benchmark(products, k):
+    """
+    Runs every profile through both backends and collects latency, self-hit and brand precision.
+    """
+    backends = {
+        "vector": lambda embedding, attributes: pgvector_search(embedding, attributes, k=k),
+        "hybrid": lambda embedding, attributes: sync_to_async(hybrid_search)(embedding, attributes, k=k),
+    }
+    results = {name: {"latencies": [], "hits": [], "brand_precision": []} for name in backends}
+
+    for product in products:
+        attributes = product_profile(product)
+        embedding = await get_embedding(embedding_text(attributes))
+
+        for name, search in backends.items():
+            start = time.perf_counter()
+            cards = await search(embedding, attributes)
+            results[name]["latencies"].append(time.perf_counter() - start)
+            results[name]["hits"].append(any(card["url"] == product.url for card in cards))
+
+            if cards:
+                brands = dict(await sync_to_async(lambda: list(
+                    Product.objects.filter(url__in=[card["url"] for card in cards]).values_list("url", "brand")
+                ))())
+                matches = sum(brands.get(card["url"], "").lower() == product.brand.lower() for card in cards)
+                results[name]["brand_precision"].append(matches / len(cards))
+
+    return results
+
+
+class Command(BaseCommand):
+    """
+    Usage: python manage.py benchmark_hybrid_search --queries 100 --k 8
+    """
+
+    help = "Compares latency and hit quality of pure vector search and hybrid lexical + vector search."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queries", type=int, default=50, help="Number of branded catalogue products used as queries.")
+        parser.add_argument("--k", type=int, default=8)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        ids = list(
+            Product.objects.active().exclude(embedding=None).exclude(brand__in=["", "Not found"]).values_list("id", flat=True)
+        )
+        if not ids:
+            self.stdout.write(self.style.WARNING("No branded products with embeddings found — aborting."))
+            return
+
+        random.seed(options["seed"])
+        sample = random.sample(ids, min(options["queries"], len(ids)))
+        products = list(Product.objects.defer("embedding", "embedding_compact").filter(id__in=sample))
+
+        self.stdout.write(f"Running {len(products)} product profiles through both backends (k={options['k']})…\n")
+        results = asyncio.run(run_benchmark(products, options["k"]))
+
+        for name, result in results.items():
+            latencies = sorted(result["latencies"])
+            self.stdout.write(
+                f"{name:<7} hit@k {statistics.mean(result['hits']):5.3f} | "
+                f"brand precision {statistics.mean(result['brand_precision'] or [0]):5.3f} | "
+                f"p50 {latencies[len(latencies) // 2] * 1000:7.2f}ms | "
+                f"p95 {latencies[int(0.95 * (len(latencies) - 1))] * 1000:7.2f}ms"
+            )
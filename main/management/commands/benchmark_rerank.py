@@ -0,0 +1,61 @@
+import statistics
+import time
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main.rerank import NUMERIC_ATTRIBUTES, rerank, rerank_cards
+
+
+BUDGET_MS = 1.0  # Re-ranking RERANK_CANDIDATES candidates must stay under this per query
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+class Command(BaseCommand):
+    """
+    Usage: python manage.py benchmark_rerank --candidates 200 --queries 2000 --k 8
+    Candidates and profiles are random, the re-ranker's cost does not depend on the catalogue.
+    """
+
+    help = "Measures the latency of re-ranking RERANK_CANDIDATES retrieval candidates against the 1 ms budget."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--candidates", type=int, default=settings.RERANK_CANDIDATES, help="Candidates per query.")
+        parser.add_argument("--queries", type=int, default=2000, help="Number of timed queries.")
+        parser.add_argument("--k", type=int, default=8, help="Number of results kept, as in query_products.")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        n, k = options["candidates"], options["k"]
+
+        # The shapes query_products passes in: lists of similarities, rows of attribute values and result cards
+        queries = []
+        for _ in range(options["queries"]):
+            relevance = rng.uniform(0.2, 0.9, n).tolist()
+            values = rng.uniform(0, 10, (n, len(NUMERIC_ATTRIBUTES))).round(1).tolist()
+            cards = [{"url": f"/product/{i}", "name": f"Product {i}", "current_price": 1000, "image": ""} for i in range(n)]
+            attributes = {name: float(rng.integers(0, 11)) for name in NUMERIC_ATTRIBUTES}
+            queries.append((relevance, values, cards, attributes))
+
+        for label, run in [
+            ("rerank", lambda relevance, values, cards, attributes: rerank(relevance, values, attributes, k)),
+            ("rerank_cards", lambda relevance, values, cards, attributes: rerank_cards(cards, relevance, values, attributes, k)),
+        ]:
+            run(*queries[0])  # Warm up NumPy and the settings lookups
+            latencies = []
+            for query in queries:
+                start = time.perf_counter()
+                run(*query)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+            p99 = percentile(latencies, 99)
+            verdict = self.style.SUCCESS("within budget") if p99 < BUDGET_MS else self.style.ERROR("over budget")
+            self.stdout.write(
+                f"{label:<13} {n} candidates | p50 {percentile(latencies, 50):.3f}ms | p95 {percentile(latencies, 95):.3f}ms | "
+                f"p99 {p99:.3f}ms | mean {statistics.mean(latencies):.3f}ms | {verdict} ({BUDGET_MS:g}ms)"
+            )
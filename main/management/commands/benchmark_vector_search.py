@@ -0,0 +1,126 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from pgvector.django import CosineDistance
+
+from main.models import Product
+from main.router import BUDGETS
+from main.search import CARD_IMAGE
+from main.signals import vector_version
+
+
+def nearest_products(embedding, product, maximum_price, k):
+    """
+    Runs the same query as pgvector_search in query_products (age, gender and price filters, card
+    columns, DISTINCT) and returns the urls of the top `k` products.
+    """
+    return [
+        row["url"] for row in Product.objects.active().annotate(
+            similarity=CosineDistance("embedding", embedding)
+        ).filter(
+            current_price__lte=maximum_price,
+            age_suitability=product.age_suitability,
+        ).filter(
+            Q(gender="unisex") | Q(gender=product.gender)
+        ).annotate(
+            image=CARD_IMAGE
+        ).order_by("similarity").values("url", "name", "current_price", "image").distinct()[:k]
+    ]
+
+
+def timed_search(embedding, product, maximum_price, k, settings_sql):
+    """
+    Times one search inside its own transaction, with `settings_sql` applied through SET LOCAL.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            for sql in settings_sql:
+                cursor.execute(sql)
+        start = time.perf_counter()
+        urls = nearest_products(embedding, product, maximum_price, k)
+        return urls, time.perf_counter() - start
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+class Command(BaseCommand):
+    """
+    Usage: python manage.py benchmark_vector_search --queries 200 --k 8 --ef-search 20 40 100 200 --iterative-scan off relaxed_order
+    Each query is a catalogue product with its own age and gender and one of the guided budgets as the price cap.
+    "fill" is the share of the k slots a search returned; the exact scan fills every slot it can.
+    """
+
+    help = "Compares recall, fill and latency of exact (sequential scan) and HNSW ordering on the query_products query."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queries", type=int, default=100, help="Number of catalogue products used as queries.")
+        parser.add_argument("--k", type=int, default=8, help="Number of results per query, as in query_products.")
+        parser.add_argument("--ef-search", type=int, nargs="+", default=[20, 40, 100, 200], help="hnsw.ef_search values to try.")
+        parser.add_argument(
+            "--iterative-scan", nargs="+", default=["off", "relaxed_order"],
+            help="hnsw.iterative_scan modes to try (pgvector 0.8+; ignored on older versions).",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        ids = list(Product.objects.active().exclude(embedding=None).values_list("id", flat=True))
+        if not ids:
+            self.stdout.write(self.style.WARNING("No products with embeddings found — aborting."))
+            return
+
+        random.seed(options["seed"])
+        sample = random.sample(ids, min(options["queries"], len(ids)))
+        queries = [
+            (product, random.choice(list(BUDGETS.values())))
+            for product in Product.objects.filter(id__in=sample).only("id", "embedding", "age_suitability", "gender")
+        ]
+        k = options["k"]
+
+        with connection.cursor() as cursor:
+            iterative = vector_version(cursor) >= (0, 8)
+        modes = options["iterative_scan"] if iterative else ["off"]
+
+        self.stdout.write(f"Benchmarking {len(queries)} queries over {len(ids)} products (k={k})…\n")
+
+        # Exact ordering: forbid index scans so the planner has to compute every distance
+        exact, exact_latencies, exact_fill = {}, [], []
+        for product, maximum_price in queries:
+            result, elapsed = timed_search(product.embedding, product, maximum_price, k, ["SET LOCAL enable_indexscan = off"])
+            exact[product.id] = result
+            exact_latencies.append(elapsed)
+            exact_fill.append(len(result) / k)
+
+        self.report("exact", exact_latencies, 1.0, statistics.mean(exact_fill))
+
+        for mode in modes:
+            for ef_search in options["ef_search"]:
+                settings_sql = [f"SET LOCAL hnsw.ef_search = {int(ef_search)}"]
+                if iterative:  # Set "off" explicitly too, connections default to HNSW_ITERATIVE_SCAN
+                    settings_sql.append(f"SET LOCAL hnsw.iterative_scan = {mode}")
+
+                latencies, recalls, fill = [], [], []
+                for product, maximum_price in queries:
+                    result, elapsed = timed_search(product.embedding, product, maximum_price, k, settings_sql)
+                    latencies.append(elapsed)
+                    fill.append(len(result) / k)
+                    expected = exact[product.id]
+                    if expected:
+                        recalls.append(len(set(result) & set(expected)) / len(expected))
+
+                self.report(
+                    f"hnsw {mode} ef={ef_search}", latencies, statistics.mean(recalls) if recalls else 0.0, statistics.mean(fill)
+                )
+
+    def report(self, label, latencies, recall, fill):
+        self.stdout.write(
+            f"{label:<30} recall@k {recall:6.3f} | fill {fill:6.3f} | "
+            f"p50 {percentile(latencies, 50) * 1000:7.2f}ms | "
+            f"p95 {percentile(latencies, 95) * 1000:7.2f}ms | "
+            f"mean {statistics.mean(latencies) * 1000:7.2f}ms"
+        )
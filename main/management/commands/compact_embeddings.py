@@ -0,0 +1,51 @@
+import time
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from main.embedding_providers import get_embedding_provider
+from main.management.commands.infer_attributes import product_embedding_text
+from main.models import EMBEDDING_COMPACT_DIMENSIONS, CatalogGeneration, Product
+
+
+class Command(BaseCommand):
+    """
+    Usage: python manage.py compact_embeddings [--reembed]
+    """
+
+    help = "Fills Product.embedding_compact with shortened half-precision copies of the product embeddings."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reembed", action="store_true",
+            help="Request shortened vectors from the embedding provider instead of truncating the stored 1536-dim ones.",
+        )
+
+    def handle(self, *args, **options):
+        dimensions = EMBEDDING_COMPACT_DIMENSIONS
+        start = time.perf_counter()
+
+        if not options["reembed"]:
+            # Truncating and re-normalising is exactly how the API shortens text-embedding-3 vectors
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE {Product._meta.db_table} "
+                    f"SET embedding_compact = l2_normalize(subvector(embedding, 1, %s))::halfvec({int(dimensions)}) "
+                    f"WHERE embedding IS NOT NULL",
+                    [dimensions],
+                )
+                updated = cursor.rowcount
+        else:
+            updated = 0
+            for product in Product.objects.defer("embedding", "embedding_compact").iterator():
+                product.embedding_compact = get_embedding_provider().embed(product_embedding_text(product), dimensions)
+                product.save(update_fields=["embedding_compact"])
+                updated += 1
+
+        if settings.VECTOR_SNAPSHOT_DIR:
+            call_command("export_embedding_snapshot")
+        CatalogGeneration.bump()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Stored {dimensions}-dim half-precision embeddings for {updated} products in {time.perf_counter() - start:.1f}s"
+        ))
@@ -0,0 +1,43 @@
+import time
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from main.embedding_providers import get_embedding_provider
+from main.embeddings import shorten_embedding
+from main.management.commands.infer_attributes import product_embedding_text
+from main.models import EMBEDDING_COMPACT_DIMENSIONS, CatalogGeneration, Product
+
+
+class Command(BaseCommand):
+    """
+    Usage: python manage.py embed_products [--provider local]
+    """
+
+    help = "Re-embeds every active product with the selected embedding provider, without re-running attribute inference."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--provider", default=settings.EMBEDDING_PROVIDER,
+            help="Embedding provider ('openai' or 'local'), defaults to EMBEDDING_PROVIDER.",
+        )
+
+    def handle(self, *args, **options):
+        provider = get_embedding_provider(options["provider"])
+        start = time.perf_counter()
+
+        updated = 0
+        for product in Product.objects.active().iterator():
+            embedding = provider.embed(product_embedding_text(product), settings.EMBEDDING_DIMENSIONS)
+            product.embedding = embedding
+            product.embedding_compact = shorten_embedding(embedding, EMBEDDING_COMPACT_DIMENSIONS)
+            product.save(update_fields=["embedding", "embedding_compact"])
+            updated += 1
+
+        if settings.VECTOR_SNAPSHOT_DIR:
+            call_command("export_embedding_snapshot")
+        CatalogGeneration.bump()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Embedded {updated} products with {provider.model} in {time.perf_counter() - start:.1f}s"
+        ))
@@ -0,0 +1,19 @@
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main.embeddings import evict_persistent_entries
+
+
+class Command(BaseCommand):
+    """
+    Usage: python manage.py evict_embedding_cache
+    """
+
+    help = "Trims the embedding_cache table to EMBEDDING_CACHE_PERSISTENT_MAX_ENTRIES least recently used rows."
+
+    def handle(self, *args, **options):
+        deleted = async_to_sync(evict_persistent_entries)()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Deleted {deleted} cached embeddings beyond the {settings.EMBEDDING_CACHE_PERSISTENT_MAX_ENTRIES} most recently used"
+        ))
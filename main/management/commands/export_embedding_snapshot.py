@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main.snapshot import export_snapshot
+
+
+class Command(BaseCommand):
+    """
+    Usage: python manage.py export_embedding_snapshot [--dir media/vector_snapshots] [--keep 3]
+    """
+
+    help = "Exports active product embeddings and filter columns to a versioned snapshot that workers memory-map."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", default=settings.VECTOR_SNAPSHOT_DIR, help="Snapshot directory (defaults to VECTOR_SNAPSHOT_DIR).")
+        parser.add_argument("--keep", type=int, default=settings.VECTOR_SNAPSHOT_KEEP, help="Number of versions to keep on disk.")
+
+    def handle(self, *args, **options):
+        if not options["dir"]:
+            self.stdout.write(self.style.WARNING("No snapshot directory — set VECTOR_SNAPSHOT_DIR or pass --dir."))
+            return
+
+        self.stdout.write(f"Exporting embedding snapshot to {options['dir']} …")
+        version, count = export_snapshot(options["dir"], keep=options["keep"])
+        self.stdout.write(self.style.SUCCESS(f"✅ Published snapshot {version} with {count} products"))
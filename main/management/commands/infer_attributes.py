@@ -1,11 +1,14 @@
 import os, json
 import numpy as np
 from django.conf import settings
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.core.serializers.json import DjangoJSONEncoder
 
-from main.models import Product
+from main.embedding_providers import get_embedding_provider
+from main.embeddings import shorten_embedding
+from main.models import EMBEDDING_COMPACT_DIMENSIONS, CatalogGeneration, Product
 from openai import OpenAI
 
 SYSTEM_MESSAGE = {
@@ -94,8 +97,8 @@ def bucket_score(x: float) -> str:
     )
 
 
-def save_embedding(self, product: Product):
-    embedding_text = f"""GIFTABILITY OF THE PRODUCT {bucket_score(product.giftability)}; educational_value {bucket_score(product.educational_value)}; 
+def product_embedding_text(product: Product) -> str:
+    return f"""GIFTABILITY OF THE PRODUCT {bucket_score(product.giftability)}; educational_value {bucket_score(product.educational_value)}; 
     durability {bucket_score(product.durability)}; value_for_money {bucket_score(product.value_for_money)}; 
     safety_perception {bucket_score(product.safety_perception)}; SEASONAL_USE OF THE PRODUCT {product.seasonal_use}; sensitivity_level {bucket_score(product.sensitivity_level)};
     waterproof {product.waterproof}; portability {bucket_score(product.portability)};
@@ -105,16 +108,15 @@ def save_embedding(self, product: Product):
     color_availability {product.color_options}; categories {product.categories}; 
     """
 
-    embedding = client.embeddings.create(
-        input=embedding_text,
-        model="text-embedding-3-small",
-        dimensions=1536
-    )
-    # print("\nGPT EMBEDDING:\n", embedding.data[0].embedding, "\n")
+
+def save_embedding(self, product: Product):
+    embedding = get_embedding_provider().embed(product_embedding_text(product), settings.EMBEDDING_DIMENSIONS)
+    # print("\nGPT EMBEDDING:\n", embedding, "\n")
 
     try:
-        embedding = np.array(embedding.data[0].embedding)
+        embedding = np.array(embedding)
         product.embedding = embedding
+        product.embedding_compact = shorten_embedding(embedding, EMBEDDING_COMPACT_DIMENSIONS)
         product.save()
     except Exception as e:
         self.stdout.write(self.style.ERROR(f"Error saving embedding: {e}"))
@@ -180,6 +182,14 @@ class Command(BaseCommand):
                     self.stdout.write(self.style.ERROR(f"Error updating product {product['name']}: {e}"))
             # break
 
+        # Publish the new embeddings to the workers that memory-map the snapshot
+        if settings.VECTOR_SNAPSHOT_DIR:
+            call_command("export_embedding_snapshot")
+
+        # Invalidate cached recommendation results in every worker
+        generation = CatalogGeneration.bump()
+        self.stdout.write(f"Catalog generation bumped to {generation}")
+
             
 
         
@@ -7,18 +7,25 @@ It extracts details such as product name, price, description, images, colors, st
 """
 
 import requests
+import httpx
+import asyncio
 import csv
 import os
 import re
 import json
+import hashlib
 import time
 import random
 import logging
 import argparse
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from django.utils import timezone
 from decimal import Decimal
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit
+from asgiref.sync import sync_to_async
 from concurrent.futures import ThreadPoolExecutor
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
@@ -31,7 +38,10 @@ from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 
 # import database
-from main.models import Product
+from django.conf import settings
+from django.core.management import call_command
+from django.db import transaction
+from main.models import CatalogGeneration, PageFetchState, Product, ScrapeRun
 
 known_colours = [
     'black', 'white', 'blue', 'red', 'green', 'yellow', 'pink', 'purple',
@@ -73,20 +83,21 @@ class RequestHandler:
             'Accept-Language': 'en-US,en;q=0.9'
         }
     
-    def get(self, url, timeout=15):
+    def get(self, url, timeout=15, headers=None):
         """
         Perform a GET request with retry logic and error handling.
         
         Args:
             url (str): URL to request
             timeout (int): Request timeout in seconds
+            headers (dict): Extra request headers, e.g. conditional request validators
             
         Returns:
             requests.Response or None: Response object if successful, None otherwise
         """
         try:
             logger.info(f"Requesting URL: {url}")
-            response = self.session.get(url, headers=self.headers, timeout=timeout)
+            response = self.session.get(url, headers={**self.headers, **(headers or {})}, timeout=timeout)
             response.raise_for_status()
             return response
         except requests.exceptions.HTTPError as e:
@@ -105,6 +116,205 @@ class RequestHandler:
             logger.error(f"\033[91mUnexpected error: {e}\033[0m")
             return None
 
+# Columns a scrape overwrites on an existing product, the inferred attributes and embeddings are kept
+UPSERT_FIELDS = [
+    'url', 'brand', 'categories', 'current_price', 'original_price', 'has_discount', 'discount_percentage',
+    'in_stock', 'color_options', 'color_availability', 'description', 'specifications',
+    'image_urls', 'image_count', 'primary_image', 'thumbnail_image', 'rating', 'size', 'weight_range', 'count',
+    'is_active', 'scrape_generation', 'updated_at',
+]
+
+
+def payload_hash(product_data):
+    """sha256 of the extracted product, without the per-run scrape date."""
+    payload = {key: value for key, value in product_data.items() if key != 'scrape_date'}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class AsyncRequestHandler:
+    """Asynchronous counterpart of RequestHandler on httpx, with HTTP/2 keep-alive and a per-host concurrency limit."""
+
+    def __init__(self, max_retries=3, backoff_factor=0.3, status_forcelist=(500, 502, 504),
+                 concurrency=20, per_host_limit=8, timeout=15):
+        """
+        Initialize the handler with the same retry settings as RequestHandler.
+
+        Args:
+            concurrency (int): Maximum requests in flight overall
+            per_host_limit (int): Maximum requests in flight to a single host
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.status_forcelist = set(status_forcelist)
+        self.per_host_limit = per_host_limit
+        self.concurrency = asyncio.Semaphore(concurrency)
+        self.host_limits = {}
+        self.client = httpx.AsyncClient(
+            http2=True,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            headers={
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                'Accept-Language': 'en-US,en;q=0.9'
+            },
+        )
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "bytes": 0, "http2": 0}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+
+    def host_limit(self, url):
+        host = urlsplit(url).netloc
+        if host not in self.host_limits:
+            self.host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self.host_limits[host]
+
+    def backoff(self, attempt):
+        """Same schedule as urllib3's Retry: backoff_factor * 2 ** (retry number - 1), no sleep before the first retry."""
+        return 0 if attempt <= 1 else self.backoff_factor * (2 ** (attempt - 1))
+
+    async def get(self, url, timeout=None, headers=None):
+        """
+        Perform a GET request, retrying connection errors, timeouts and `status_forcelist` responses.
+
+        Returns:
+            httpx.Response or None: Response object if successful, None otherwise
+        """
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.stats["retries"] += 1
+                await asyncio.sleep(self.backoff(attempt))
+            try:
+                async with self.concurrency, self.host_limit(url):
+                    logger.info(f"Requesting URL: {url}")
+                    self.stats["requests"] += 1
+                    response = await self.client.get(url, headers=headers, timeout=timeout or httpx.USE_CLIENT_DEFAULT)
+            except (httpx.ConnectError, httpx.TimeoutException, httpx.RemoteProtocolError) as e:
+                logger.warning(f"\033[93m{type(e).__name__} on {url} (attempt {attempt + 1}): {e}\033[0m")
+                continue
+            except httpx.HTTPError as e:
+                logger.error(f"\033[91mRequest Exception: {e}\033[0m")
+                break
+
+            if response.status_code in self.status_forcelist:
+                logger.warning(f"\033[93mHTTP {response.status_code} on {url} (attempt {attempt + 1})\033[0m")
+                continue
+            if response.is_error:
+                logger.error(f"\033[91mHTTP Error: {response.status_code} for {url}\033[0m")
+                break
+
+            self.stats["bytes"] += len(response.content)
+            self.stats["http2"] += response.http_version == "HTTP/2"
+            return response
+
+        self.stats["failures"] += 1
+        return None
+
+class DriverPool:
+    """Bounded pool of long-lived headless Chrome drivers, checked out one page at a time."""
+
+    def __init__(self, size=2, max_pages=50, page_load_timeout=30, headless=True):
+        """
+        Resolve the driver binary once; drivers themselves are started lazily, up to `size` of them.
+
+        Args:
+            size (int): Maximum number of drivers alive at the same time
+            max_pages (int): Pages a driver serves before it is recycled
+            page_load_timeout (int): Page load timeout in seconds
+            headless (bool): Run Chrome without a window
+        """
+        self.size = size
+        self.max_pages = max_pages
+        self.page_load_timeout = page_load_timeout
+        self.headless = headless
+        self.service_path = ChromeDriverManager().install()
+
+        # `available` guards idle and alive and is notified whenever either changes, so a thread waiting
+        # for a driver wakes up both when one is returned and when a retired one frees a slot
+        self.available = threading.Condition()
+        self.idle = []
+        self.alive = 0
+        self.pages = {}  # id(driver) -> pages served
+        self.stats = {"started": 0, "recycled": 0, "crashed": 0, "pages": 0}
+
+    def _start_driver(self):
+        options = webdriver.ChromeOptions()
+        if self.headless:
+            options.add_argument('--headless=new')
+        options.add_argument('--disable-gpu')
+        options.add_argument('--no-sandbox')
+        options.add_argument('--disable-dev-shm-usage')
+
+        driver = webdriver.Chrome(service=Service(self.service_path), options=options)
+        driver.set_page_load_timeout(self.page_load_timeout)
+        self.pages[id(driver)] = 0
+        self.stats["started"] += 1
+        return driver
+
+    def _quit(self, driver):
+        self.pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"\033[93mError quitting driver: {e}\033[0m")
+        with self.available:
+            self.alive -= 1
+            self.available.notify()
+
+    def acquire(self):
+        """Return an idle driver, start a new one if the pool is not full, otherwise wait for either."""
+        with self.available:
+            while not self.idle and self.alive >= self.size:
+                self.available.wait()
+            if self.idle:
+                return self.idle.pop()
+            self.alive += 1
+
+        try:
+            return self._start_driver()
+        except Exception:
+            with self.available:
+                self.alive -= 1
+                self.available.notify()
+            raise
+
+    def release(self, driver, crashed=False):
+        """Return a driver to the pool, or quit it after a crash or once it has served `max_pages` pages."""
+        self.pages[id(driver)] = self.pages.get(id(driver), 0) + 1
+        self.stats["pages"] += 1
+        if crashed or self.pages[id(driver)] >= self.max_pages:
+            self.stats["crashed" if crashed else "recycled"] += 1
+            self._quit(driver)
+        else:
+            with self.available:
+                self.idle.append(driver)
+                self.available.notify()
+
+    @contextmanager
+    def driver(self):
+        """Check out a driver for one page; a WebDriverException retires it instead of returning it."""
+        driver = self.acquire()
+        crashed = False
+        try:
+            yield driver
+        except WebDriverException:
+            crashed = True
+            raise
+        finally:
+            self.release(driver, crashed)
+
+    def close(self):
+        """Quit every idle driver."""
+        with self.available:
+            drivers, self.idle = self.idle, []
+        for driver in drivers:
+            self._quit(driver)
+        logger.info(f"Driver pool closed: {self.stats}")
+
 class BaseParser:
     """Base parser for extracting common product information."""
     
@@ -284,8 +494,8 @@ class BaseParser:
                     if text:
                         descriptions.append(text)
 
-            # Remove duplicates and empty strings
-            descriptions = list(set(descriptions))
+            # Remove duplicates, keeping page order so payload_hash is stable across runs
+            descriptions = list(dict.fromkeys(descriptions))
             return descriptions if descriptions else ["Not found"]
         except Exception as e:
             logger.error(f"\033[91mError extracting description: {e}\033[0m")
@@ -453,6 +663,7 @@ class BaseParser:
         """Extract product images."""
         try:
             image_urls = []
+            thumbnail_url = None
             
             # Try to get gallery data from JavaScript
             scripts = self.soup.select('script[type="text/x-magento-init"]')
@@ -468,6 +679,8 @@ class BaseParser:
                             for item in gallery_data['data']:
                                 if 'full' in item:
                                     image_urls.append(item['full'])
+                                if 'thumb' in item and not thumbnail_url:
+                                    thumbnail_url = item['thumb']
                             break
                 except (json.JSONDecodeError, KeyError):
                     continue
@@ -511,13 +724,15 @@ class BaseParser:
             
             return {
                 'image_urls': image_urls,
-                'image_count': len(image_urls)
+                'image_count': len(image_urls),
+                'thumbnail_url': thumbnail_url or (image_urls[0] if image_urls else '')
             }
         except Exception as e:
             logger.error(f"\033[91mError extracting images: {e}\033[0m")
             return {
                 'image_urls': [],
-                'image_count': 0
+                'image_count': 0,
+                'thumbnail_url': ''
             }
     
     def get_categories(self):
@@ -649,6 +864,7 @@ class BaseParser:
         image_data = self.get_images()
         product_data['image_urls'] = json.dumps(image_data['image_urls'])
         product_data['image_count'] = image_data['image_count']
+        product_data['thumbnail_url'] = image_data['thumbnail_url']
         
         # Get ratings
         rating_data = self.get_ratings()
@@ -964,39 +1180,50 @@ class StorageManager:
         """Initialize the storage manager with filename."""
         self.filename = filename
         self.fieldnames = None  # Will store column headers
+        self.generation = 0     # Scrape generation stamped on every saved product
     
+    def product_fields(self, product_data):
+        """Model field values of a scraped product, everything but the name it is keyed by."""
+        image_urls = json.loads(product_data.get('image_urls', '[]'))
+        primary_image = image_urls[0] if image_urls else ''
+
+        return {
+            'url': product_data.get('url', ''),
+            'brand': product_data.get('brand', ''),
+            'categories': product_data.get('categories', []),
+
+            'current_price': Decimal(str(product_data.get('current_price', 0))),
+            'original_price': Decimal(str(product_data.get('original_price', 0))),
+            'has_discount': str(product_data.get('has_discount', '')).lower() == 'yes',
+            'discount_percentage': Decimal(str(product_data.get('discount_percentage', 0))),
+
+            'in_stock': str(product_data.get('availability', '')).lower() == 'in stock',
+            'color_options': json.loads(product_data.get('color_options', '[]')),
+            'color_availability': json.loads(product_data.get('color_availability', '{}')),
+
+            'description': json.loads(product_data.get('description', '[]')),
+            'specifications': json.loads(product_data.get('specifications', '{}')),
+
+            'image_urls': image_urls,
+            'image_count': int(product_data.get('image_count', 0)),
+            'primary_image': primary_image,
+            'thumbnail_image': product_data.get('thumbnail_url') or primary_image,
+
+            'rating': Decimal(str(product_data['rating'])) if product_data.get('rating') not in [None, 'Not found'] else None,
+            'size': product_data.get('size', ''),
+            'weight_range': product_data.get('weight_range', ''),
+            'count': int(product_data['count']) if product_data.get('count') not in [None, 'Not specified', 'Not found'] else None,
+            'is_active': True,
+            'scrape_generation': self.generation,
+        }
+
     def save_to_db(self, product_data):
         """Save product data to the database file."""
         try:
             # URL is ignored since the unique constraint is on the name field
             product, created = Product.objects.update_or_create(
             name=product_data['name'],
-            defaults={
-                'url': product_data.get('url', ''),
-                'brand': product_data.get('brand', ''),
-                'categories': product_data.get('categories', []),
-
-                'current_price': Decimal(str(product_data.get('current_price', 0))),
-                'original_price': Decimal(str(product_data.get('original_price', 0))),
-                'has_discount': str(product_data.get('has_discount', '')).lower() == 'yes',
-                'discount_percentage': Decimal(str(product_data.get('discount_percentage', 0))),
-
-                'in_stock': str(product_data.get('availability', '')).lower() == 'in stock',
-                'color_options': json.loads(product_data.get('color_options', '[]')),
-                'color_availability': json.loads(product_data.get('color_availability', '{}')),
-
-                'description': json.loads(product_data.get('description', '[]')),
-                'specifications': json.loads(product_data.get('specifications', '{}')),
-
-                'image_urls': json.loads(product_data.get('image_urls', '[]')),
-                'image_count': int(product_data.get('image_count', 0)),
-
-                'rating': Decimal(str(product_data['rating'])) if product_data.get('rating') not in [None, 'Not found'] else None,
-                'size': product_data.get('size', ''),
-                'weight_range': product_data.get('weight_range', ''),
-                'count': int(product_data['count']) if product_data.get('count') not in [None, 'Not specified', 'Not found'] else None,
-                'is_active': True,
-                }
+            defaults=self.product_fields(product_data),
             )
 
             logger.info(f"{'Created' if created else 'Updated'} product in DB: {product.name}")
@@ -1006,18 +1233,114 @@ class StorageManager:
             logger.error(f"\033[91mError saving product to database: {e}\033[0m")
             raise e
     
+class BatchWriter:
+    """
+    Buffers scraped products and upserts them in batches, one INSERT ... ON CONFLICT (name) DO UPDATE per
+    batch inside a transaction. A batch that fails is rolled back and retried row by row with
+    StorageManager.save_to_db, so one bad product only costs its own row.
+    """
+
+    def __init__(self, storage_manager, batch_size=200):
+        self.storage_manager = storage_manager
+        self.batch_size = max(batch_size, 1)
+        self.buffer = []
+        self.saved = []     # URLs written, by a batch or by the fallback
+        self.failed = []    # URLs that could not be written at all
+        self.stats = {"batches": 0, "rows": 0, "fallback_batches": 0, "failed_rows": 0, "seconds": 0.0}
+
+    def add(self, product_data):
+        self.buffer.append(product_data)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered products."""
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        start = time.perf_counter()
+
+        try:
+            # ON CONFLICT cannot update a row twice in one statement, keep the last scrape of a name
+            rows = {
+                product_data['name']: Product(name=product_data['name'], **self.storage_manager.product_fields(product_data))
+                for product_data in batch
+            }
+            with transaction.atomic():
+                Product.objects.bulk_create(
+                    list(rows.values()), update_conflicts=True, unique_fields=["name"], update_fields=UPSERT_FIELDS,
+                )
+            self.saved.extend(product_data['url'] for product_data in batch)
+            fallback = False
+        except Exception as e:
+            logger.warning(f"\033[93mBatch upsert of {len(batch)} products failed, writing them one by one: {e}\033[0m")
+            fallback = True
+            for product_data in batch:
+                try:
+                    self.storage_manager.save_to_db(product_data)
+                    self.saved.append(product_data['url'])
+                except Exception:
+                    self.failed.append(product_data['url'])
+                    self.stats["failed_rows"] += 1
+
+        elapsed = time.perf_counter() - start
+        self.stats["batches"] += 1
+        self.stats["rows"] += len(batch)
+        self.stats["fallback_batches"] += fallback
+        self.stats["seconds"] += elapsed
+        logger.info(
+            f"Wrote batch {self.stats['batches']}: {len(batch)} products in {elapsed * 1000:.0f}ms "
+            f"({len(batch) / elapsed:.0f} rows/s{', row by row' if fallback else ''})"
+        )
+
 class KiddozScraper:
     """Main scraper class that orchestrates the scraping process."""
     
-    def __init__(self, max_retries=3, delay=1.0, timeout=30, use_selenium=False):
-        """Initialize the scraper with settings."""
+    def __init__(self, max_retries=3, delay=1.0, timeout=30, use_selenium=False, drivers=2, pages_per_driver=50, headless=True,
+                 fetch_backend="requests", concurrency=20, per_host_limit=8, conditional=True, sweep=True, max_failed_share=0.1,
+                 write_batch_size=200):
+        """
+        Initialize the scraper with settings.
+
+        fetch_backend selects how pages are fetched when Selenium is not used: "requests" (threads, blocking
+        requests.Session) or "httpx" (one event loop with up to `concurrency` requests in flight, at most
+        `per_host_limit` per host).
+
+        With `conditional`, pages are requested with the ETag / Last-Modified of the last run and
+        products whose extracted data has not changed are not written again.
+
+        Every product a run saves or finds unchanged is stamped with the run's scrape generation. With
+        `sweep`, products the run did not see are deactivated at the end, in one UPDATE, and only if at
+        most `max_failed_share` of the pages failed; an incomplete run leaves the catalogue as it was.
+
+        Scraped products are written by a BatchWriter in batches of `write_batch_size`.
+        """
+        if fetch_backend not in ("requests", "httpx"):
+            raise ValueError(f"Unknown fetch_backend {fetch_backend!r}")
+        if fetch_backend == "httpx" and use_selenium:
+            raise ValueError("The httpx fetch backend cannot render pages, disable use_selenium")
+
         self.request_handler = RequestHandler(max_retries=max_retries)
+        self.max_retries = max_retries
+        self.fetch_backend = fetch_backend
+        self.concurrency = concurrency
+        self.per_host_limit = per_host_limit
+        self.conditional = conditional
+        self.sweep = sweep
+        self.max_failed_share = max_failed_share
+        self.run = None
+        self.fetch_states = {}   # url -> PageFetchState of the last run, read by the worker threads
+        self.fetched = {}        # url -> validators and hash seen in this run
         self.storage_manager = StorageManager()
+        self.write_batch_size = write_batch_size
+        self.writer = None
         self.delay = delay
         self.timeout = timeout
         self.failed_urls = []
         self.use_selenium = use_selenium
-        Product.objects.update(is_active=False)  # Mark all products as inactive before scraping
+        self.driver_pool = DriverPool(
+            size=drivers, max_pages=pages_per_driver, page_load_timeout=timeout, headless=headless
+        ) if use_selenium else None
     
     def scrape_product(self, url):
         """Scrape a single product page."""
@@ -1028,58 +1351,220 @@ class KiddozScraper:
             ################# BS4 CODE #################
 
             if self.use_selenium:
-                # Load the page with Selenium
-                options = webdriver.ChromeOptions()
-                # options.add_argument('--headless')  # Comment this out if you want to see the browser
-                options.add_argument('--disable-gpu')
-                options.add_argument('--no-sandbox')
-
+                # Load the page with a pooled Selenium driver
                 try:
-                    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-                    driver.set_page_load_timeout(self.timeout)
-                    driver.get(url)
+                    with self.driver_pool.driver() as driver:
+                        driver.get(url)
 
-                    # Wait for a specific element that indicates the page is fully loaded
-                    try:
-                        WebDriverWait(driver, 4).until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, ".swatch-attribute.color"))
-                        )
-                    except TimeoutException:
-                        logger.warning(f"\033[93mTimeout waiting for content on: {url}\033[0m")
+                        # Wait for a specific element that indicates the page is fully loaded
+                        try:
+                            WebDriverWait(driver, 4).until(
+                                EC.presence_of_element_located((By.CSS_SELECTOR, ".swatch-attribute.color"))
+                            )
+                        except TimeoutException:
+                            logger.warning(f"\033[93mTimeout waiting for content on: {url}\033[0m")
 
-                    html = driver.page_source
+                        html = driver.page_source
                     soup = BeautifulSoup(html, 'html.parser')
-                    driver.quit()
                 except WebDriverException as e:
                     logger.error(f"\033[91mSelenium WebDriver Error: {e}\033[0m")
                     self.failed_urls.append(url)
                     return None
             else:
                  # Get page content
-                response = self.request_handler.get(url, timeout=self.timeout)
+                response = self.request_handler.get(url, timeout=self.timeout, headers=self.conditional_headers(url))
                 if not response:
                     logger.error(f"\033[91mFailed to get response from {url}\033[0m")
                     self.failed_urls.append(url)
                     return None
+                if response.status_code == 304:
+                    return self.not_modified(url, response.headers)
                 
                 # Parse HTML
                 soup = BeautifulSoup(response.text, 'html.parser')
+                return self.check_changed(url, self.parse_page(soup, url), response.headers, len(response.content))
             
-            # Create appropriate parser
-            parser = ProductParser.create_parser(soup, url)
-            
-            # Parse product data
-            product_data = parser.parse()
-            
-            # Process and standardize data
-            product_data = DataProcessor.process_product_data(product_data)
-            
-            logger.info(f"Successfully scraped: {product_data['name']}")
-            return product_data
+            return self.check_changed(url, self.parse_page(soup, url), {}, len(html.encode('utf-8')))
+        except Exception as e:
+            logger.error(f"\033[91mError scraping product {url}: {e}\033[0m")
+            self.failed_urls.append(url)
+            return None
+
+    def parse_page(self, soup, url):
+        """Parse a fetched product page into standardized product data."""
+        # Create appropriate parser
+        parser = ProductParser.create_parser(soup, url)
+        
+        # Parse product data
+        product_data = parser.parse()
+        
+        # Process and standardize data
+        product_data = DataProcessor.process_product_data(product_data)
+        
+        logger.info(f"Successfully scraped: {product_data['name']}")
+        return product_data
+
+    def conditional_headers(self, url):
+        """If-None-Match / If-Modified-Since from the last run of a page."""
+        state = self.fetch_states.get(url)
+        if not state:
+            return {}
+        headers = {}
+        if state.etag:
+            headers['If-None-Match'] = state.etag
+        if state.last_modified:
+            headers['If-Modified-Since'] = state.last_modified
+        return headers
+
+    def not_modified(self, url, headers):
+        """Result for a 304 response: the page, and so the product, is as in the last run."""
+        logger.info(f"Not modified: {url}")
+        self.fetched[url] = {
+            'not_modified': True,
+            'etag': headers.get('ETag') or self.fetch_states[url].etag,
+            'last_modified': headers.get('Last-Modified') or self.fetch_states[url].last_modified,
+        }
+        return {'url': url, 'unchanged': True}
+
+    def check_changed(self, url, product_data, headers, size):
+        """Record the validators and hash of a downloaded page, and skip the product if its hash is unchanged."""
+        content_hash = payload_hash(product_data)
+        self.fetched[url] = {
+            'not_modified': False,
+            'etag': headers.get('ETag', ''),
+            'last_modified': headers.get('Last-Modified', ''),
+            'content_hash': content_hash,
+            'content_length': size,
+            'product_name': product_data['name'],
+        }
+        state = self.fetch_states.get(url)
+        if state and state.content_hash == content_hash and state.product_name == product_data['name']:
+            logger.info(f"Unchanged: {product_data['name']}")
+            return {'url': url, 'unchanged': True}
+        return product_data
+
+    def handle_result(self, product_data):
+        """Queue a scraped product for writing; unchanged products are only counted and stamped after the run."""
+        if product_data.get('unchanged'):
+            self.unchanged.append(product_data['url'])
+            return
+        self.writer.add(product_data)
+
+    def load_fetch_states(self, urls):
+        """Load the last run's state of the URLs about to be scraped, in the main thread."""
+        self.fetched, self.unchanged = {}, []
+        if not self.conditional:
+            self.fetch_states = {}
+            return
+
+        states = PageFetchState.objects.in_bulk(urls, field_name='url')
+        # A product removed from the catalogue since has to be scraped again, whatever its page says
+        existing = set(Product.objects.filter(name__in=[state.product_name for state in states.values()]).values_list('name', flat=True))
+        self.fetch_states = {url: state for url, state in states.items() if state.product_name in existing}
+        logger.info(f"Loaded the previous state of {len(self.fetch_states)}/{len(urls)} pages")
+
+    def save_fetch_states(self):
+        """
+        Store this run's validators and hashes of the saved and unchanged pages, reactivate the unchanged
+        products and return the skip counts. Pages that failed keep their previous state.
+        """
+        now = timezone.now()
+        rows = {}  # by url, a URL listed twice is written once
+        stats = {'not_modified': 0, 'unchanged': 0, 'bytes_saved': 0}
+
+        for url in self.unchanged:
+            previous, seen = self.fetch_states[url], self.fetched[url]
+            if seen['not_modified']:
+                stats['not_modified'] += 1
+                stats['bytes_saved'] += previous.content_length
+                seen = {**seen, 'content_hash': previous.content_hash, 'content_length': previous.content_length}
+            else:
+                stats['unchanged'] += 1
+            rows[url] = PageFetchState(
+                url=url, etag=seen['etag'], last_modified=seen['last_modified'], content_hash=seen['content_hash'],
+                content_length=seen['content_length'], product_name=previous.product_name, fetched_at=now, changed_at=previous.changed_at,
+            )
+
+        for url in self.writer.saved:
+            seen = self.fetched[url]
+            rows[url] = PageFetchState(
+                url=url, etag=seen['etag'], last_modified=seen['last_modified'], content_hash=seen['content_hash'],
+                content_length=seen['content_length'], product_name=seen['product_name'], fetched_at=now, changed_at=now,
+            )
+
+        PageFetchState.objects.bulk_create(
+            list(rows.values()), batch_size=500, update_conflicts=True, unique_fields=['url'],
+            update_fields=['etag', 'last_modified', 'content_hash', 'content_length', 'product_name', 'fetched_at', 'changed_at'],
+        )
+        Product.objects.filter(name__in=[self.fetch_states[url].product_name for url in self.unchanged]).update(
+            is_active=True, scrape_generation=self.run.pk
+        )
+        return stats
+
+    def finish_run(self, seen_count):
+        """Close the scrape run and, if it succeeded, sweep the products it did not see."""
+        run = self.run
+        run.finished_at = timezone.now()
+        run.products_seen = seen_count
+        run.products_failed = len(self.failed_urls)
+        failed_share = run.products_failed / max(seen_count + run.products_failed, 1)
+        run.succeeded = failed_share <= self.max_failed_share
+
+        if not run.succeeded:
+            logger.warning(f"\033[93m{failed_share:.0%} of the pages failed, not deactivating any products\033[0m")
+        elif self.sweep:
+            # Products whose page failed this time are kept, they were not seen but were not found missing either
+            run.products_swept = (
+                Product.objects.filter(is_active=True, scrape_generation__lt=run.pk)
+                .exclude(url__in=self.failed_urls)
+                .update(is_active=False)
+            )
+            logger.info(f"Deactivated {run.products_swept} products not seen by scrape run {run.pk}")
+        run.save()
+
+    async def scrape_product_async(self, handler, url):
+        """Scrape a single product page with the async fetch backend."""
+        try:
+            response = await handler.get(url, timeout=self.timeout, headers=self.conditional_headers(url))
+            if not response:
+                logger.error(f"\033[91mFailed to get response from {url}\033[0m")
+                self.failed_urls.append(url)
+                return None
+            if response.status_code == 304:
+                return self.not_modified(url, response.headers)
+
+            # Parsing is CPU-bound, keep the event loop free for the requests in flight
+            product_data = await asyncio.to_thread(lambda: self.parse_page(BeautifulSoup(response.text, 'html.parser'), url))
+            return self.check_changed(url, product_data, response.headers, len(response.content))
         except Exception as e:
             logger.error(f"\033[91mError scraping product {url}: {e}\033[0m")
             self.failed_urls.append(url)
             return None
+
+    async def scrape_products_async(self, urls):
+        """Fetch every product page from one event loop and save the results as they complete."""
+        successful_count = 0
+        handle_result = sync_to_async(self.handle_result)
+
+        async with AsyncRequestHandler(
+            max_retries=self.max_retries, concurrency=self.concurrency, per_host_limit=self.per_host_limit, timeout=self.timeout,
+        ) as handler:
+            tasks = [asyncio.create_task(self.scrape_product_async(handler, url)) for url in urls]
+            for i, task in enumerate(asyncio.as_completed(tasks)):
+                product_data = None
+                try:
+                    product_data = await task
+                    if product_data:
+                        await handle_result(product_data)
+                        successful_count += 1
+                except Exception as e:
+                    logger.error(f"\033[91mError saving product: {e}\033[0m")
+                    if product_data:
+                        self.failed_urls.append(product_data['url'])
+
+                logger.info(f"Progress: {i+1}/{len(urls)} ({successful_count} successful, {len(self.failed_urls)} failed)")
+
+        return successful_count, handler.stats
     
     def scrape_products(self, urls, output_file='kiddoz_products.csv', max_workers=5):
         """Scrape multiple product pages."""
@@ -1094,41 +1579,92 @@ class KiddozScraper:
             
             # Reset failed URLs
             self.failed_urls = []
+            self.load_fetch_states(urls)
+            self.run = ScrapeRun.objects.create()
+            self.storage_manager.generation = self.run.pk
+            self.writer = BatchWriter(self.storage_manager, batch_size=self.write_batch_size)
             
             # Scrape products
             successful_count = 0
             total_count = len(urls)
             
             logger.info(f"Starting to scrape {total_count} products")
-            
-            # Use ThreadPoolExecutor for parallel scraping
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                future_to_url = {executor.submit(self.scrape_product, url): url for url in urls}
+            start = time.perf_counter()
+            fetch_stats = None
+
+            if self.fetch_backend == "httpx":
+                successful_count, fetch_stats = asyncio.run(self.scrape_products_async(urls))
+
+            else:
+                # Use ThreadPoolExecutor for parallel scraping
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    future_to_url = {executor.submit(self.scrape_product, url): url for url in urls}
                 
-                for i, future in enumerate(future_to_url):
-                    url = future_to_url[future]
-                    try:
-                        product_data = future.result()
+                    for i, future in enumerate(future_to_url):
+                        url = future_to_url[future]
+                        try:
+                            product_data = future.result()
                         
-                        # Save product data
-                        if product_data:
-                            self.storage_manager.save_to_db(product_data)
-                            successful_count += 1
+                            # Save product data
+                            if product_data:
+                                self.handle_result(product_data)
+                                successful_count += 1
                         
-                        # Log progress
-                        logger.info(f"Progress: {i+1}/{total_count} ({successful_count} successful, {len(self.failed_urls)} failed)")
+                            # Log progress
+                            logger.info(f"Progress: {i+1}/{total_count} ({successful_count} successful, {len(self.failed_urls)} failed)")
                         
-                        # Add delay between submissions to avoid overloading
-                        time.sleep(self.delay / max_workers)
-                    except Exception as e:
-                        logger.error(f"\033[91mError processing result for {url}: {e}\033[0m")
-                        self.failed_urls.append(url)
-            
+                            # Add delay between submissions to avoid overloading
+                            time.sleep(self.delay / max_workers)
+                        except Exception as e:
+                            logger.error(f"\033[91mError processing result for {url}: {e}\033[0m")
+                            self.failed_urls.append(url)
+            
+            # Write the last partial batch; products whose write failed count as failed pages
+            self.writer.flush()
+            self.failed_urls.extend(self.writer.failed)
+            successful_count -= len(self.writer.failed)
+
             # Log summary
+            elapsed = time.perf_counter() - start
             logger.info(f"Scraping completed: {successful_count}/{total_count} products scraped successfully")
+            logger.info(
+                f"Throughput: {total_count / elapsed:.2f} pages/s, {successful_count / elapsed:.2f} products/s "
+                f"in {elapsed:.1f}s ({self.fetch_backend}{', selenium' if self.use_selenium else ''})"
+            )
+            skip_stats = self.save_fetch_states()
+            self.finish_run(successful_count)
+            if self.conditional:
+                logger.info(
+                    f"Skipped {skip_stats['not_modified'] + skip_stats['unchanged']} unchanged products: "
+                    f"{skip_stats['not_modified']} not modified (304, ~{skip_stats['bytes_saved'] / 1e6:.1f} MB not downloaded), "
+                    f"{skip_stats['unchanged']} with the same content hash"
+                )
+            write_stats = self.writer.stats
+            if write_stats["batches"]:
+                logger.info(
+                    f"Write stats: {write_stats['rows']} products in {write_stats['batches']} batches, "
+                    f"{write_stats['seconds']:.2f}s ({write_stats['rows'] / max(write_stats['seconds'], 1e-9):.0f} rows/s), "
+                    f"{write_stats['fallback_batches']} batches row by row, {write_stats['failed_rows']} rows failed"
+                )
+            if fetch_stats:
+                logger.info(
+                    f"Fetch stats: {fetch_stats['requests']} requests, {fetch_stats['retries']} retries, "
+                    f"{fetch_stats['failures']} failures, {fetch_stats['http2']} over HTTP/2, "
+                    f"{fetch_stats['bytes'] / 1e6:.1f} MB ({fetch_stats['bytes'] / 1e6 / elapsed:.2f} MB/s)"
+                )
+
+            # Publish prices, stock and deactivations to the workers that memory-map the snapshot
+            if settings.VECTOR_SNAPSHOT_DIR:
+                call_command("export_embedding_snapshot")
+
+            # Invalidate cached recommendation results in every worker
+            CatalogGeneration.bump()
             
             return successful_count, self.failed_urls, len(self.failed_urls)
         except Exception as e:
             logger.error(f"\033[91mError in scrape_products: {e}\033[0m")
             return 0, len(urls)
+        finally:
+            if self.driver_pool:
+                self.driver_pool.close()
 
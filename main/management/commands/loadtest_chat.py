@@ -0,0 +1,146 @@
+import asyncio
+import random
+import time
+from collections import defaultdict
+
+import httpx
+from django.core.management.base import BaseCommand
+
+
+# Multi-turn conversations replayed by each session: the mode picked on /set-choice/ and the /chat/ messages.
+# Guided ones follow the option bubbles, so against the mock server they end in a product profile.
+CONVERSATIONS = {
+    "guided": [
+        ("Guided Questions", ["Gift for a Baby", "6-11 Months", "Either", "Toys", "< Rs. 10,000"]),
+        ("Guided Questions", ["My Child", "6-8 Years", "Boy", "Clothing", "< Rs. 2,500"]),
+        ("Guided Questions", ["Mothers", "Skin Care", "< Rs. 25,000"]),
+    ],
+    "free": [
+        ("Free Flow", ["I need a waterproof toy for my 4 year old son under Rs. 5000"]),
+        ("Free Flow", ["Looking for a gift for a newborn baby girl", "Something soft, under Rs. 10,000"]),
+        ("Free Flow", ["Diapers for my toddler", "Size L please", "Keep it under Rs. 8,000"]),
+    ],
+}
+
+
+def percentile(values, q):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))]
+
+
+async def run_session(base_url: str, mode: str, messages: list[str], stream: bool, timeout: float) -> list[tuple[str, float]]:
+    """
+    Plays one shopper conversation against a running server and returns (endpoint, latency) of each POST.
+    Every session gets its own client so it carries its own session and CSRF cookies.
+    """
+    latencies = []
+    chat_path = "chat/stream/" if stream else "chat/"
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as http:
+        # Loading the home page resets the chat and hands out the CSRF cookie
+        response = await http.get("/")
+        response.raise_for_status()
+        headers = {"X-CSRFToken": http.cookies.get("csrftoken", "")}
+
+        for path, message in [("set-choice/", mode)] + [(chat_path, message) for message in messages]:
+            start = time.perf_counter()
+            response = await http.post(path, json={"message": message}, headers=headers)
+            response.raise_for_status()
+            if stream and b"event: error" in response.content:
+                raise RuntimeError(f"{path} streamed an error event")
+            latencies.append((path, time.perf_counter() - start))
+
+    return latencies
+
+
+async def run_load(base_url: str, sessions: int, concurrency: int, guided_share: float, stream: bool,
+                   timeout: float, seed: int) -> dict:
+    """
+    Runs `sessions` conversations, a `guided_share` of them guided and the rest free-flow,
+    with at most `concurrency` of them in flight at once.
+    """
+    rng = random.Random(seed)
+    plans = []
+    for _ in range(sessions):
+        kind = "guided" if rng.random() < guided_share else "free"
+        plans.append((kind, *rng.choice(CONVERSATIONS[kind])))
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = defaultdict(list), []
+    completed = defaultdict(int)
+
+    async def worker(kind, mode, messages):
+        async with semaphore:
+            try:
+                for path, latency in await run_session(base_url, mode, messages, stream, timeout):
+                    latencies[path].append(latency)
+                completed[kind] += 1
+            except Exception as e:
+                errors.append(e)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(*plan) for plan in plans))
+    elapsed = time.perf_counter() - start
+
+    return {"elapsed": elapsed, "latencies": latencies, "completed": completed, "errors": errors}
+
+
+class Command(BaseCommand):
+    """
+    Usage: python manage.py loadtest_chat --url http://127.0.0.1:8000 --sessions 200 --concurrency 50 --guided-share 0.5
+    Run the app against `manage.py mock_openai` to measure the app alone.
+    """
+
+    help = "Replays concurrent guided and free-flow conversations against /set-choice/ and /chat/ and reports latency percentiles and throughput."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the running server.")
+        parser.add_argument("--sessions", type=int, default=100, help="Total number of conversations to run.")
+        parser.add_argument("--concurrency", type=int, default=20, help="Conversations in flight at the same time.")
+        parser.add_argument("--guided-share", type=float, default=0.5, help="Share of guided conversations, the rest are free-flow.")
+        parser.add_argument("--stream", action="store_true", help="Use /chat/stream/ instead of /chat/.")
+        parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds.")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"Running {options['sessions']} sessions against {options['url']} "
+            f"with concurrency {options['concurrency']}…"
+        )
+
+        result = asyncio.run(run_load(
+            options["url"], options["sessions"], options["concurrency"], options["guided_share"],
+            options["stream"], options["timeout"], options["seed"],
+        ))
+
+        elapsed = result["elapsed"]
+        completed = sum(result["completed"].values())
+        requests = sum(len(latencies) for latencies in result["latencies"].values())
+        self.stdout.write(f"Elapsed:            {elapsed:.2f}s")
+        self.stdout.write(
+            f"Sessions completed: {completed}/{options['sessions']} "
+            f"(guided {result['completed']['guided']}, free-flow {result['completed']['free']})"
+        )
+        self.stdout.write(f"Sessions / second:  {completed / elapsed:.2f}")
+        self.stdout.write(f"Requests / second:  {requests / elapsed:.2f}\n")
+
+        self.stdout.write(f"{'endpoint':<14} {'count':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+        rows = dict(result["latencies"])
+        rows["all"] = [latency for latencies in result["latencies"].values() for latency in latencies]
+        for path, latencies in rows.items():
+            latencies = sorted(latencies)
+            if not latencies:
+                continue
+            self.stdout.write(
+                f"{path:<14} {len(latencies):>6} "
+                + " ".join(f"{percentile(latencies, q) * 1000:>6.0f}ms" for q in (50, 95, 99))
+                + f" {latencies[-1] * 1000:>6.0f}ms"
+            )
+
+        if result["errors"]:
+            self.stdout.write(self.style.WARNING(f"{len(result['errors'])} sessions failed, e.g. {result['errors'][0]!r}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("All sessions completed"))
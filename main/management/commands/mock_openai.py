@@ -0,0 +1,38 @@
+import uvicorn
+from django.core.management.base import BaseCommand
+
+from main.mock_openai import MockOpenAI
+
+
+class Command(BaseCommand):
+    """
+    Usage: python manage.py mock_openai --port 8100 --chat-latency lognormal:900:0.4
+    Then run the app with OPENAI_BASE_URL=http://127.0.0.1:8100/v1 OPENAI_API_KEY=mock
+    """
+
+    help = "Serves a local stand-in for the OpenAI chat completions and embeddings endpoints, for load tests."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8100)
+        parser.add_argument(
+            "--chat-latency", default="lognormal:900:0.4",
+            help="Chat completion latency (time to first token when streaming) in ms: "
+                 "fixed:MS, uniform:LOW:HIGH, normal:MEAN:SD or lognormal:MEDIAN:SIGMA.",
+        )
+        parser.add_argument("--embedding-latency", default="lognormal:120:0.3", help="Embedding latency in ms, same format.")
+        parser.add_argument("--token-interval", type=float, default=15.0, help="Delay between streamed chunks in ms.")
+        parser.add_argument("--turns-before-results", type=int, default=3, help="User turns after which a product profile is always returned.")
+
+    def handle(self, *args, **options):
+        app = MockOpenAI(
+            chat_latency=options["chat_latency"],
+            embedding_latency=options["embedding_latency"],
+            token_interval=options["token_interval"],
+            turns_before_results=options["turns_before_results"],
+        )
+        self.stdout.write(
+            f"Mock OpenAI API on http://{options['host']}:{options['port']}/v1 "
+            f"(chat {options['chat_latency']}, embeddings {options['embedding_latency']})"
+        )
+        uvicorn.run(app, host=options["host"], port=options["port"], log_level="warning")
@@ -0,0 +1,28 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from main.models import Conversation
+
+
+class Command(BaseCommand):
+    """
+    Usage: python manage.py prune_conversations [--days 14]
+    """
+
+    help = "Deletes conversation logs older than the session lifetime, with their turns."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=float, default=settings.SESSION_COOKIE_AGE / 86400,
+            help="Age in days after which a conversation is deleted (defaults to SESSION_COOKIE_AGE).",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        deleted, per_model = Conversation.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Deleted {per_model.get('main.Conversation', 0)} conversations and "
+            f"{per_model.get('main.ConversationTurn', 0)} turns older than {options['days']:g} days"
+        ))
@@ -0,0 +1,44 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from main.models import Product
+
+INDEX_NAME = "product_embedding_hnsw_idx"
+
+
+class Command(BaseCommand):
+    """
+    Usage: python manage.py rebuild_vector_index [--m 16] [--ef-construction 64] [--concurrently]
+    """
+
+    help = "Drops and rebuilds the HNSW index on Product.embedding with the configured build parameters."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--m", type=int, default=settings.HNSW_M, help="Links per node.")
+        parser.add_argument("--ef-construction", type=int, default=settings.HNSW_EF_CONSTRUCTION, help="Candidate list size while building.")
+        parser.add_argument("--maintenance-work-mem", default="512MB", help="Memory available to the build.")
+        parser.add_argument("--concurrently", action="store_true", help="Build without locking the table against writes.")
+
+    def handle(self, *args, **options):
+        table = Product._meta.db_table
+        concurrently = "CONCURRENTLY " if options["concurrently"] else ""
+
+        self.stdout.write(
+            f"Rebuilding {INDEX_NAME} on {table} (m={options['m']}, ef_construction={options['ef_construction']})…"
+        )
+
+        start = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('maintenance_work_mem', %s, false)", [options["maintenance_work_mem"]])
+            cursor.execute(f"DROP INDEX {concurrently}IF EXISTS {INDEX_NAME}")
+            cursor.execute(
+                f"CREATE INDEX {concurrently}{INDEX_NAME} ON {table} "
+                f"USING hnsw (embedding vector_cosine_ops) WITH (m = %s, ef_construction = %s)",
+                [options["m"], options["ef_construction"]],
+            )
+            cursor.execute("SELECT pg_size_pretty(pg_relation_size(%s::regclass))", [INDEX_NAME])
+            size = cursor.fetchone()[0]
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt {INDEX_NAME} in {time.perf_counter() - start:.1f}s ({size})"))
@@ -9,8 +9,15 @@ import logging
 logger = logging.getLogger("KiddozScraper")
 
 LIMIT = 0  # Set to 0 for no limit, or specify a number to limit the number of products scraped
-WORKERS = 1  # Number of threads to use for scraping
+WORKERS = 4  # Number of threads to use for scraping, each with its own pooled Chrome driver when using Selenium
 USE_SELENIUM = True  # Set to True if you want to use Selenium for JS-rendered pages
+PAGES_PER_DRIVER = 50  # Restart each Chrome after this many pages to keep its memory in check
+FETCH_BACKEND = "requests"  # "httpx" fetches every page from one event loop over HTTP/2 (requires USE_SELENIUM = False)
+CONCURRENCY = 20  # Requests in flight with the httpx backend
+PER_HOST_LIMIT = 8  # Of which at most this many to a single host
+MAX_FAILED_SHARE = 0.1  # Deactivate products missing from the run only if at most this share of the pages failed
+WRITE_BATCH_SIZE = 200  # Products upserted per INSERT ... ON CONFLICT statement
+CONDITIONAL = True  # Skip pages that are unchanged since the last run (304 or same content hash), False forces a full refresh
 
 
 class Command(BaseCommand):
@@ -41,7 +48,16 @@ class Command(BaseCommand):
             max_retries=3,
             delay=1.0,
             timeout=30,
-            use_selenium=USE_SELENIUM  # Set True if you want JS-rendered support
+            use_selenium=USE_SELENIUM,  # Set True if you want JS-rendered support
+            drivers=WORKERS,
+            pages_per_driver=PAGES_PER_DRIVER,
+            fetch_backend=FETCH_BACKEND,
+            concurrency=CONCURRENCY,
+            per_host_limit=PER_HOST_LIMIT,
+            conditional=CONDITIONAL,
+            sweep=LIMIT == 0,  # A partial run has not seen the rest of the catalogue
+            max_failed_share=MAX_FAILED_SHARE,
+            write_batch_size=WRITE_BATCH_SIZE,
         )
 
         # Scrape products
@@ -0,0 +1,87 @@
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+
+from .conversation import record_session_size
+from .timing import request_spans, span, observe, summarise, server_timing_header, log_request
+
+
+class ServerTimingMiddleware:
+    """
+    Collects the stage spans recorded while a request is handled and reports them as a Server-Timing
+    header, a structured log line and the per-stage histograms served at /metrics/.
+
+    Streamed responses send their headers before the stages run, so their header only covers the time
+    to the first byte; the log line and histograms are written once the stream has finished.
+    Must come first in MIDDLEWARE so the session save is inside the timed request.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        spans, token, start = self.begin()
+        response = self.get_response(request)
+        return self.finish(request, response, spans, token, start)
+
+    async def __acall__(self, request):
+        spans, token, start = self.begin()
+        response = await self.get_response(request)
+        return self.finish(request, response, spans, token, start)
+
+    def begin(self):
+        spans = []
+        return spans, request_spans.set(spans), time.perf_counter()
+
+    def finish(self, request, response, spans, token, start):
+        elapsed = time.perf_counter() - start
+        if settings.SERVER_TIMING_HEADER:
+            response["Server-Timing"] = server_timing_header({**summarise(spans), "total": elapsed})
+
+        def complete():
+            total = time.perf_counter() - start
+            observe("total", total)
+            log_request(request, response.status_code, spans, total)
+
+        if not response.streaming:
+            request_spans.reset(token)
+            complete()
+            return response
+
+        # Keep the spans list current while the stream runs, it is consumed in this same task
+        content = response.streaming_content
+        if response.is_async:
+            async def timed():
+                try:
+                    async for chunk in content:
+                        yield chunk
+                finally:
+                    complete()
+        else:
+            def timed():
+                try:
+                    yield from content
+                finally:
+                    complete()
+        response.streaming_content = timed()
+        return response
+
+
+class TimedSessionMiddleware(SessionMiddleware):
+    """
+    SessionMiddleware that records serialising and saving the session as the "session" stage,
+    and the session's size in the conversation storage stats.
+    """
+
+    def process_response(self, request, response):
+        record_session_size(request.session)
+        with span("session"):
+            return super().process_response(request, response)
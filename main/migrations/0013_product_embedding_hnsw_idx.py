@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 09:40
+
+import pgvector.django.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_embeddingcacheentry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding'], m=16, name='product_embedding_hnsw_idx', opclasses=['vector_cosine_ops']),
+        ),
+    ]
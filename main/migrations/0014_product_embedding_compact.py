@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-17 10:05
+
+import pgvector.django.halfvec
+import pgvector.django.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0013_product_embedding_hnsw_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='embedding_compact',
+            field=pgvector.django.halfvec.HalfVectorField(blank=True, dimensions=512, null=True),
+        ),
+        # Shortened text-embedding-3 vectors are the truncated full vector, re-normalised (pgvector 0.7+)
+        migrations.RunSQL(
+            sql=(
+                "UPDATE main_product SET embedding_compact = "
+                "l2_normalize(subvector(embedding, 1, 512))::halfvec(512) "
+                "WHERE embedding IS NOT NULL;"
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding_compact'], m=16, name='product_emb_compact_hnsw_idx', opclasses=['halfvec_cosine_ops']),
+        ),
+    ]
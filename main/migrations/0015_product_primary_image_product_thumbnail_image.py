@@ -0,0 +1,41 @@
+# Generated by Django 5.2.1 on 2026-10-17 10:31
+
+import json
+from django.db import migrations, models
+
+
+def populate_primary_image(apps, schema_editor):
+    Product = apps.get_model('main', 'Product')
+    products = []
+    for product in Product.objects.only('id', 'image_urls').iterator():
+        image_urls = product.image_urls
+        if isinstance(image_urls, str):
+            try:
+                image_urls = json.loads(image_urls)
+            except json.JSONDecodeError:
+                image_urls = []
+        product.primary_image = image_urls[0] if isinstance(image_urls, list) and image_urls else ''
+        product.thumbnail_image = product.primary_image
+        products.append(product)
+    Product.objects.bulk_update(products, ['primary_image', 'thumbnail_image'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_product_embedding_compact'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='primary_image',
+            field=models.URLField(blank=True, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='thumbnail_image',
+            field=models.URLField(blank=True, max_length=500),
+        ),
+        migrations.RunPython(populate_primary_image, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-17 11:02
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0015_product_primary_image_product_thumbnail_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=(
+                    django.contrib.postgres.search.SearchVector('name', config='english', weight='A')
+                    + django.contrib.postgres.search.SearchVector('brand', config='english', weight='A')
+                    + django.contrib.postgres.search.SearchVector(django.db.models.functions.comparison.Cast('categories', models.TextField()), config='english', weight='B')
+                    + django.contrib.postgres.search.SearchVector('usage_type', config='english', weight='C')
+                ),
+                output_field=django.contrib.postgres.search.SearchVectorField(),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_vector_gin'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-17 15:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0018_conversation_conversationturn'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageFetchState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.CharField(max_length=500, unique=True)),
+                ('etag', models.CharField(blank=True, default='', max_length=255)),
+                ('last_modified', models.CharField(blank=True, default='', max_length=64)),
+                ('content_hash', models.CharField(blank=True, default='', max_length=64)),
+                ('content_length', models.PositiveIntegerField(default=0)),
+                ('product_name', models.CharField(blank=True, default='', max_length=255)),
+                ('fetched_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'page_fetch_state',
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-17 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0019_pagefetchstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrapeRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('succeeded', models.BooleanField(default=False)),
+                ('products_seen', models.PositiveIntegerField(default=0)),
+                ('products_failed', models.PositiveIntegerField(default=0)),
+                ('products_swept', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'scrape_run',
+            },
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='scrape_generation',
+            field=models.PositiveBigIntegerField(db_index=True, default=0),
+        ),
+    ]
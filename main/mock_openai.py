@@ -0,0 +1,236 @@
+"""
+Local stand-in for the parts of the OpenAI API the app uses (`/v1/chat/completions` and `/v1/embeddings`),
+so the chat views can be load-tested without the network. Served as a plain ASGI app by `manage.py mock_openai`.
+
+Chat replies are canned JSON objects in the SYSTEM_MESSAGE format: an "options" question until the shopper
+has given a budget (or answered enough turns), then a "results" product profile. Embeddings come from the
+deterministic local hashing provider. Every reply is delayed by a configurable latency distribution.
+"""
+import asyncio, hashlib, json, random, re, time, uuid
+
+from .embedding_providers import HashingEmbeddingProvider
+
+
+CATEGORY_OPTIONS = ["Clothing", "Toys", "Diapers", "Maternity", "Skin Care", "Schooling", "Gear", "Activity", "Start Over"]
+BUDGET_OPTIONS = ["< Rs. 2,500", "< Rs. 10,000", "< Rs. 25,000", "< Rs. 50,000", "Rs. 50,000+", "Start Over"]
+
+# Keyword → age_suitability, first match wins
+AGE_KEYWORDS = [
+    ("mother", "mothers"),
+    ("newborn", "0-5 months"),
+    ("baby", "6-11 months"),
+    ("toddler", "1.6-2 years"),
+    ("child", "3-5 years"),
+    ("year old", "3-5 years"),
+]
+
+
+class LatencyDistribution:
+    """
+    Parses a latency spec in milliseconds and samples delays in seconds:
+        fixed:MS | uniform:LOW:HIGH | normal:MEAN:SD | lognormal:MEDIAN:SIGMA
+    """
+
+    def __init__(self, spec):
+        kind, *params = spec.split(":")
+        params = [float(param) for param in params]
+        samplers = {
+            "fixed": lambda: params[0],
+            "uniform": lambda: random.uniform(params[0], params[1]),
+            "normal": lambda: max(0.0, random.gauss(params[0], params[1])),
+            "lognormal": lambda: params[0] * random.lognormvariate(0.0, params[1]),
+        }
+        if kind not in samplers:
+            raise ValueError(f"Unknown latency distribution {spec!r}, expected one of {sorted(samplers)}")
+        self.spec = spec
+        self.sampler = samplers[kind]
+
+    def sample(self):
+        return self.sampler() / 1000
+
+
+def canned_profile(text):
+    """
+    Product profile for the conversation text, with the filters inferred from a few keywords.
+    """
+    lowered = text.lower()
+    age = next((age for keyword, age in AGE_KEYWORDS if keyword in lowered), "all ages")
+    gender = "female" if re.search(r"\b(daughter|girl|mother)\b", lowered) else "male" if re.search(r"\b(son|boy)\b", lowered) else "unisex"
+    prices = [int(price.replace(",", "")) for price in re.findall(r"rs\.?\s*([\d,]+)", lowered)]
+    category = next((option for option in CATEGORY_OPTIONS[:-1] if option.lower() in lowered), "Toys")
+
+    # Same conversation, same profile, so repeated load runs hit the same caches
+    seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+    rng = random.Random(seed)
+    score = lambda: round(rng.uniform(4, 9), 1)
+
+    return {
+        "age_suitability": age,
+        "gender": gender,
+        "maximum_price": prices[-1] if prices else 1000000,
+        "giftability": score(),
+        "educational_value": score(),
+        "durability": score(),
+        "value_for_money": score(),
+        "safety_perception": score(),
+        "seasonal_use": [],
+        "sensitivity_level": score(),
+        "waterproof": "waterproof" in lowered,
+        "portability": score(),
+        "design_features": ["compact"],
+        "package_quantity": 1,
+        "usage_type": f"{category.lower()} for everyday use",
+        "material_origin": None,
+        "chemical_safety": "non-toxic",
+        "size": None,
+        "weight_range": None,
+        "count": None,
+        "color_options": None,
+        "brand": None,
+        "categories": [category],
+    }
+
+
+def canned_reply(messages, turns_before_results):
+    """
+    Reply in the SYSTEM_MESSAGE format for the conversation so far.
+    """
+    user_messages = [
+        message["content"] for message in messages
+        if message.get("role") == "user" and message.get("content") not in ("Free Flow", "Guided Questions")
+    ]
+
+    # ai_jsonify_string: the repair prompt just gets a valid object back
+    if user_messages and user_messages[-1].startswith("Convert this string"):
+        return {"response": "Here is what I found for you."}
+
+    text = " ".join(user_messages)
+    has_budget = bool(re.search(r"rs\.?\s*[\d,]+", text.lower()))
+    if has_budget or len(user_messages) >= turns_before_results:
+        return {
+            "response": "Here is the ideal product profile based on what you told me.",
+            "results": canned_profile(text),
+        }
+    if not any(option.lower() in text.lower() for option in CATEGORY_OPTIONS[:-1]):
+        return {"response": "Which category of products are you interested in?", "options": CATEGORY_OPTIONS}
+    return {"response": "What is your budget?", "options": BUDGET_OPTIONS}
+
+
+class MockOpenAI:
+    """
+    ASGI app answering the chat completions (plain and streamed) and embeddings endpoints.
+    """
+
+    def __init__(self, chat_latency="lognormal:900:0.4", embedding_latency="lognormal:120:0.3",
+                 token_interval=15.0, chunk_size=12, turns_before_results=3):
+        self.chat_latency = LatencyDistribution(chat_latency)
+        self.embedding_latency = LatencyDistribution(embedding_latency)
+        self.token_interval = token_interval / 1000
+        self.chunk_size = chunk_size
+        self.turns_before_results = turns_before_results
+        self.embedder = HashingEmbeddingProvider()
+        self.counters = {"chat": 0, "embeddings": 0}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        path = scope["path"].rstrip("/")
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            return await self.send_json(send, 400, {"error": {"message": "Invalid JSON body"}})
+
+        if scope["method"] == "POST" and path.endswith("/chat/completions"):
+            return await self.chat_completions(send, payload)
+        if scope["method"] == "POST" and path.endswith("/embeddings"):
+            return await self.embeddings(send, payload)
+        if scope["method"] == "GET" and path == "/stats":
+            return await self.send_json(send, 200, self.counters)
+        return await self.send_json(send, 404, {"error": {"message": f"Unknown endpoint {path}"}})
+
+    async def chat_completions(self, send, payload):
+        self.counters["chat"] += 1
+        content = json.dumps(canned_reply(payload.get("messages", []), self.turns_before_results))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = payload.get("model", "gpt-4o")
+
+        if not payload.get("stream"):
+            await asyncio.sleep(self.chat_latency.sample())
+            return await self.send_json(send, 200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(content) // 4, "total_tokens": len(content) // 4},
+            })
+
+        # Streamed: the sampled latency is the time to first token, then one chunk every token_interval
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache")],
+        })
+        await asyncio.sleep(self.chat_latency.sample())
+
+        def chunk(delta, finish_reason=None):
+            data = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return {"type": "http.response.body", "body": f"data: {json.dumps(data)}\n\n".encode(), "more_body": True}
+
+        await send(chunk({"role": "assistant", "content": ""}))
+        for start in range(0, len(content), self.chunk_size):
+            await send(chunk({"content": content[start:start + self.chunk_size]}))
+            await asyncio.sleep(self.token_interval)
+        await send(chunk({}, "stop"))
+        await send({"type": "http.response.body", "body": b"data: [DONE]\n\n", "more_body": False})
+
+    async def embeddings(self, send, payload):
+        self.counters["embeddings"] += 1
+        inputs = payload.get("input", "")
+        inputs = inputs if isinstance(inputs, list) else [inputs]
+        dimensions = payload.get("dimensions") or 1536
+
+        await asyncio.sleep(self.embedding_latency.sample())
+        return await self.send_json(send, 200, {
+            "object": "list",
+            "data": [
+                {"object": "embedding", "index": i, "embedding": self.embedder.embed(text, dimensions)}
+                for i, text in enumerate(inputs)
+            ],
+            "model": payload.get("model", "text-embedding-3-small"),
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        })
+
+    async def send_json(self, send, status, data):
+        body = json.dumps(data).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,7 +1,11 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models.functions import Cast
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
-from pgvector.django import VectorField
+from django.utils import timezone
+from pgvector.django import VectorField, HalfVectorField, HnswIndex
 
 
 age_suitability_choices = (
@@ -16,6 +20,10 @@ age_suitability_choices = (
     ('all ages', 'all ages'),
 )
 
+# Dimensions of Product.embedding_compact. Migration 0014 creates the column with this value frozen as 512;
+# changing it needs a new AlterField migration (dropping and recreating the HNSW index), then `python manage.py compact_embeddings`.
+EMBEDDING_COMPACT_DIMENSIONS = 512
+
 gender_choices = (
     ('male', 'male'),
     ('female', 'female'),
@@ -31,7 +39,7 @@ months = {
 class ProductManager(models.Manager):
 
     def active(self):
-        return self.get_queryset().filter(is_active=True).defer('embedding')
+        return self.get_queryset().filter(is_active=True).defer('embedding', 'embedding_compact')
 
 # Create your models here.
 class Product (models.Model):
@@ -65,6 +73,8 @@ class Product (models.Model):
     # — media —
     image_urls = models.JSONField(blank=True, null=True)          # list of image URLs
     image_count = models.PositiveIntegerField(default=0)
+    primary_image = models.URLField(max_length=500, blank=True)   # first of image_urls, denormalised for result cards
+    thumbnail_image = models.URLField(max_length=500, blank=True) # gallery thumbnail, falls back to primary_image
 
     # — extra attributes —
     rating = models.DecimalField(max_digits=3, decimal_places=2,
@@ -77,6 +87,7 @@ class Product (models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)  # soft delete flag
+    scrape_generation = models.PositiveBigIntegerField(default=0, db_index=True)  # ScrapeRun that last saw the product
 
     # — inferred attributes —
     age_suitability = models.CharField(max_length=20, choices=age_suitability_choices, default='0-5 months')  # e.g. "0-5 months"
@@ -99,10 +110,46 @@ class Product (models.Model):
     chemical_safety = models.CharField(max_length=255, blank=True)  # e.g. "Non-toxic", "Treated"
 
     embedding = VectorField(dimensions=1536, null=True, blank=True)  # e.g. (vector representation of the product)  
+    # Shortened, half-precision copy of `embedding`, see EMBEDDING_COMPACT_DIMENSIONS
+    embedding_compact = HalfVectorField(dimensions=EMBEDDING_COMPACT_DIMENSIONS, null=True, blank=True)
+
+    # — lexical search —
+    # Stored tsvector for the hybrid search backend, kept up to date by Postgres
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector("name", weight="A", config="english")
+            + SearchVector("brand", weight="A", config="english")
+            + SearchVector(Cast("categories", models.TextField()), weight="B", config="english")
+            + SearchVector("usage_type", weight="C", config="english")
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
 
 
     objects = ProductManager()
 
+    class Meta:
+        indexes = [
+            # Approximate nearest-neighbour index for the cosine ordering in query_products.
+            # Build parameters can be changed with `python manage.py rebuild_vector_index`.
+            HnswIndex(
+                name="product_embedding_hnsw_idx",
+                fields=["embedding"],
+                m=16,
+                ef_construction=64,
+                opclasses=["vector_cosine_ops"],
+            ),
+            HnswIndex(
+                name="product_emb_compact_hnsw_idx",
+                fields=["embedding_compact"],
+                m=16,
+                ef_construction=64,
+                opclasses=["halfvec_cosine_ops"],
+            ),
+            GinIndex(name="product_search_vector_gin", fields=["search_vector"]),
+        ]
+
     def __str__(self) -> str:
         return self.name
     
@@ -134,3 +181,132 @@ class Product (models.Model):
     def save(self, *args, **kwargs):
         # self.full_clean()  # Run all model validation
         super().save(*args, **kwargs)
+
+
+class EmbeddingCacheEntry(models.Model):
+    """
+    Persistent tier of the query embedding cache, shared by every worker process.
+    """
+
+    key = models.CharField(max_length=64, unique=True)           # sha256 of model + dimensions + normalised text
+    model = models.CharField(max_length=100)                      # e.g. "text-embedding-3-small"
+    dimensions = models.PositiveIntegerField()                    # e.g. 1536
+    embedding = VectorField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)  # used for LRU eviction
+
+    class Meta:
+        db_table = "embedding_cache"
+
+    def __str__(self) -> str:
+        return f"{self.model}/{self.dimensions}: {self.key[:12]}"
+
+
+class CatalogGeneration(models.Model):
+    """
+    Single-row counter bumped whenever the catalogue changes (scraper runs, attribute inference, re-embedding).
+    Cached recommendation results are keyed by it, so a bump invalidates every worker's result cache.
+    """
+
+    generation = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "catalog_generation"
+
+    def __str__(self) -> str:
+        return f"Catalog generation {self.generation}"
+
+    @classmethod
+    def current(cls) -> int:
+        return cls.objects.filter(pk=1).values_list("generation", flat=True).first() or 0
+
+    @classmethod
+    async def acurrent(cls) -> int:
+        return await cls.objects.filter(pk=1).values_list("generation", flat=True).afirst() or 0
+
+    @classmethod
+    def bump(cls) -> int:
+        """
+        Atomically increments the generation and returns the new value.
+        """
+        cls.objects.get_or_create(pk=1)
+        cls.objects.filter(pk=1).update(generation=models.F("generation") + 1, updated_at=timezone.now())
+        return cls.current()
+
+
+class Conversation(models.Model):
+    """
+    A shopper's chat, referenced from the session by id so the session itself stays a few bytes.
+    The system prompt is stored as a version reference, not as text.
+    """
+
+    system_prompt = models.CharField(max_length=32)   # Version of SYSTEM_MESSAGE the conversation started with
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = "conversation"
+
+    def __str__(self) -> str:
+        return f"Conversation {self.pk} ({self.system_prompt})"
+
+
+class ConversationTurn(models.Model):
+    """
+    Append-only log of the messages of a conversation, one row per message, in id order.
+    """
+
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name="turns")
+    role = models.CharField(max_length=16)            # "user" or "assistant"
+    content = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "conversation_turn"
+
+    def __str__(self) -> str:
+        return f"{self.role}: {self.content[:50]}"
+
+
+class ScrapeRun(models.Model):
+    """
+    One scraper run. Its id is the scrape generation stamped on every product the run saw; products
+    of older generations are deactivated in a single sweep once the run has succeeded.
+    """
+
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    succeeded = models.BooleanField(default=False)
+    products_seen = models.PositiveIntegerField(default=0)
+    products_failed = models.PositiveIntegerField(default=0)
+    products_swept = models.PositiveIntegerField(default=0)    # Deactivated by the sweep
+
+    class Meta:
+        db_table = "scrape_run"
+
+    def __str__(self) -> str:
+        return f"Scrape run {self.pk} ({'succeeded' if self.succeeded else 'incomplete'})"
+
+
+class PageFetchState(models.Model):
+    """
+    What the scraper last saw at a product URL: the HTTP validators for conditional requests and a hash
+    of the extracted product, so unchanged pages are neither re-parsed nor re-written.
+    """
+
+    url = models.CharField(max_length=500, unique=True)
+    etag = models.CharField(max_length=255, blank=True, default="")
+    last_modified = models.CharField(max_length=64, blank=True, default="")    # Sent back as If-Modified-Since
+    content_hash = models.CharField(max_length=64, blank=True, default="")     # sha256 of the extracted product
+    content_length = models.PositiveIntegerField(default=0)                    # Body size of the last full download
+    product_name = models.CharField(max_length=255, blank=True, default="")    # Product the page was saved as
+
+    fetched_at = models.DateTimeField(default=timezone.now)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "page_fetch_state"
+
+    def __str__(self) -> str:
+        return self.url
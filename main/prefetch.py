@@ -0,0 +1,88 @@
+import asyncio
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from .cache import LRUCache
+from .timing import request_spans
+
+
+# Result cache keys warmed speculatively and not yet requested by a shopper
+prefetched_keys = LRUCache(max_entries=settings.RESULT_CACHE_MAX_ENTRIES)
+
+prefetch_stats = {"scheduled": 0, "completed": 0, "failed": 0, "capped": 0, "hits": 0}
+
+# Running prefetch tasks, referenced so they are not garbage collected mid-flight
+tasks = set()
+semaphores = {}
+
+
+def concurrency_limit():
+    """
+    Semaphore shared by the prefetches of this event loop, so speculation never crowds out real requests.
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in semaphores:
+        semaphores[loop] = asyncio.Semaphore(settings.PREFETCH_CONCURRENCY)
+    return semaphores[loop]
+
+
+async def schedule_prefetch(request, profiles, fetch):
+    """
+    Starts background `fetch(profile)` calls for the profiles the shopper's next click can request,
+    within the PREFETCH_MAX_PER_SESSION budget of the session.
+    """
+    if not settings.PREFETCH_ENABLED or not profiles:
+        return
+
+    used = await request.session.aget("prefetched", 0)
+    allowed = max(0, settings.PREFETCH_MAX_PER_SESSION - used)
+    prefetch_stats["capped"] += max(0, len(profiles) - allowed)
+    profiles = profiles[:allowed]
+    if not profiles:
+        return
+    await request.session.aset("prefetched", used + len(profiles))
+
+    for profile in profiles:
+        task = asyncio.create_task(prefetch(profile, fetch))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        prefetch_stats["scheduled"] += 1
+
+
+async def prefetch(profile, fetch):
+    # Let the response that showed the options go out first, and keep these spans off its timings
+    request_spans.set(None)
+    await asyncio.sleep(settings.PREFETCH_DELAY_SECONDS)
+    async with concurrency_limit():
+        # The request's ORM thread is gone by now: run the fetch's ORM calls on a thread of its own and
+        # close its connections when done, as Django does at the end of a request
+        async with ThreadSensitiveContext():
+            try:
+                await fetch(profile)
+                prefetch_stats["completed"] += 1
+            except Exception as e:
+                prefetch_stats["failed"] += 1
+                print(f"Prefetch failed: {e}")
+            finally:
+                await sync_to_async(connections.close_all)()
+
+
+def mark_prefetched(key):
+    prefetched_keys.set(key, True)
+
+
+def record_hit(key):
+    """
+    Counts a shopper request served from a speculatively warmed result.
+    """
+    if prefetched_keys.pop(key):
+        prefetch_stats["hits"] += 1
+
+
+def prefetch_stats_summary():
+    return {
+        **prefetch_stats,
+        "in_flight": len(tasks),
+        "hit_rate": round(prefetch_stats["hits"] / prefetch_stats["completed"], 4) if prefetch_stats["completed"] else 0.0,
+    }
@@ -0,0 +1,145 @@
+import json, re
+from django.conf import settings
+
+
+def nullable(schema):
+    return {**schema, "type": [schema["type"], "null"]}
+
+
+STRING = {"type": "string"}
+NUMBER = {"type": "number"}
+INTEGER = {"type": "integer"}
+STRINGS = {"type": "array", "items": STRING}
+
+# The product profile of SYSTEM_MESSAGE. Strict mode needs every property listed as required,
+# so "if known, otherwise null" attributes are nullable instead of optional.
+PROFILE_PROPERTIES = {
+    "age_suitability": {"type": "string", "enum": [
+        "0-5 months", "6-11 months", "1-1.5 years", "1.6-2 years", "3-5 years", "6-8 years", "9-12 years", "mothers", "all ages",
+    ]},
+    "gender": {"type": "string", "enum": ["male", "female", "unisex"]},
+    "maximum_price": NUMBER,
+    "giftability": NUMBER,
+    "educational_value": NUMBER,
+    "durability": NUMBER,
+    "value_for_money": NUMBER,
+    "safety_perception": NUMBER,
+    "seasonal_use": {"type": "array", "items": INTEGER},
+    "sensitivity_level": NUMBER,
+    "waterproof": {"type": "boolean"},
+    "portability": NUMBER,
+    "design_features": STRINGS,
+    "package_quantity": INTEGER,
+    "usage_type": STRING,
+    "material_origin": nullable(STRING),
+    "chemical_safety": STRING,
+    "size": nullable(STRING),
+    "weight_range": nullable(STRING),
+    "count": nullable(INTEGER),
+    "color_options": nullable(STRINGS),
+    "brand": nullable(STRING),
+    "categories": nullable(STRINGS),
+}
+
+# The response/options/results contract every assistant reply follows
+REPLY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "response": STRING,
+        "options": nullable(STRINGS),
+        "results": {"anyOf": [
+            {
+                "type": "object",
+                "properties": PROFILE_PROPERTIES,
+                "required": list(PROFILE_PROPERTIES),
+                "additionalProperties": False,
+            },
+            {"type": "null"},
+        ]},
+    },
+    "required": ["response", "options", "results"],
+    "additionalProperties": False,
+}
+
+
+def reply_response_format():
+    """
+    response_format argument of the chat calls for GPT_RESPONSE_FORMAT:
+        'json_schema' — structured outputs, the reply always matches REPLY_SCHEMA
+        'json_object' — JSON mode, the reply is always a JSON object
+        'text'        — no constraint, rely on SYSTEM_MESSAGE and the repair steps
+    """
+    if settings.GPT_RESPONSE_FORMAT == "json_schema":
+        return {"type": "json_schema", "json_schema": {"name": "assistant_reply", "strict": True, "schema": REPLY_SCHEMA}}
+    if settings.GPT_RESPONSE_FORMAT == "json_object":
+        return {"type": "json_object"}
+    return None
+
+
+CODE_FENCE = re.compile(r"^\s*```[a-zA-Z]*\s*|\s*```\s*$")
+TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+
+# How replies were parsed: valid as sent, fixed by a local repair step, fixed by the remote call, or not at all
+repair_stats = {"valid": 0, "strip_fences": 0, "outermost_object": 0, "trailing_commas": 0, "remote": 0, "failed": 0}
+
+
+def outermost_object(text):
+    """
+    The first balanced {...} in `text`, skipping braces inside strings. None if there is none.
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+
+    depth, in_string, escaped = 0, False, False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+
+def repair_json(content):
+    """
+    Tries cheap local fixes for the usual ways a reply breaks the JSON rule, one after the other:
+    ```json fences, prose around the object, and trailing commas.
+    @return: Tuple of the parsed object and the step that fixed it, or (None, None).
+    """
+    text = CODE_FENCE.sub("", content)
+    steps = [
+        ("strip_fences", lambda text: text),
+        ("outermost_object", outermost_object),
+        ("trailing_commas", lambda text: TRAILING_COMMA.sub(r"\1", text)),
+    ]
+    for step, fix in steps:
+        text = fix(text)
+        if text is None:
+            return None, None
+        try:
+            parsed = json.loads(text)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(parsed, dict):
+            return parsed, step
+    return None, None
+
+
+def repair_stats_summary():
+    total = sum(repair_stats.values())
+    return {
+        **repair_stats,
+        "remote_rate": round(repair_stats["remote"] / total, 4) if total else 0.0,
+    }
@@ -0,0 +1,71 @@
+import numpy as np
+from django.conf import settings
+
+
+# Numeric 0-10 attributes shared by the product profile GPT-4o returns and the Product model
+NUMERIC_ATTRIBUTES = [
+    "giftability",
+    "educational_value",
+    "durability",
+    "value_for_money",
+    "safety_perception",
+    "sensitivity_level",
+    "portability",
+]
+
+
+def profile_vector(attributes):
+    """
+    The requested value of every numeric attribute, NaN where the profile does not mention it.
+    """
+    values = []
+    for name in NUMERIC_ATTRIBUTES:
+        try:
+            values.append(float(attributes[name]))
+        except (KeyError, TypeError, ValueError):
+            values.append(np.nan)
+    return np.array(values, dtype=np.float32)
+
+
+def rerank(relevance, values, attributes, k, weights=None, alpha=None):
+    """
+    Re-orders retrieval candidates by blending their retrieval score with how close their numeric
+    attributes are to the requested profile, in one vectorised pass.
+    @param relevance: (N,) retrieval scores, higher is better (cosine similarity or fused rank score).
+    @param values: (N, F) numeric attributes of the candidates, columns in NUMERIC_ATTRIBUTES order.
+    @param attributes: Product profile returned by GPT-4o.
+    @param k: Number of candidates to keep.
+    @return: Indices of the best `k` candidates, best first.
+    """
+    weights = settings.RERANK_WEIGHTS if weights is None else weights
+    alpha = settings.RERANK_ALPHA if alpha is None else alpha
+
+    relevance = np.asarray(relevance, dtype=np.float32)
+    if relevance.size == 0:
+        return np.array([], dtype=np.intp)
+
+    # Min-max scale the retrieval score so cosine similarities and fused rank scores blend the same way
+    spread = relevance.max() - relevance.min()
+    relevance = (relevance - relevance.min()) / spread if spread > 0 else np.ones_like(relevance)
+
+    profile = profile_vector(attributes)
+    w = np.array([weights.get(name, 0.0) for name in NUMERIC_ATTRIBUTES], dtype=np.float32)
+    w[np.isnan(profile)] = 0.0  # Attributes the shopper did not ask about do not count
+
+    if w.sum() > 0:
+        differences = (np.asarray(values, dtype=np.float32) - np.nan_to_num(profile)) / 10.0
+        closeness = 1.0 - np.sqrt((differences ** 2) @ w / w.sum())
+        score = alpha * relevance + (1.0 - alpha) * closeness
+    else:
+        score = relevance
+
+    k = min(k, score.size)
+    top = np.argpartition(-score, k - 1)[:k]
+    return top[np.argsort(-score[top])]
+
+
+def rerank_cards(cards, relevance, values, attributes, k):
+    """
+    Applies `rerank` to a list of result cards and returns the best `k` of them.
+    """
+    return [cards[i] for i in rerank(relevance, values, attributes, k)]
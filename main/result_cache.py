@@ -0,0 +1,71 @@
+import hashlib, json, threading, time
+from django.conf import settings
+
+from .cache import LRUCache
+from .models import CatalogGeneration
+from .rerank import profile_vector
+from .search import search_engine
+
+
+# Product cards of recent recommendation queries, keyed by catalogue generation + canonical profile hash
+result_cache = LRUCache(max_entries=settings.RESULT_CACHE_MAX_ENTRIES)
+
+# The generation is re-read from the database at most every RESULT_CACHE_GENERATION_SECONDS
+generation_state = {"generation": None, "checked_at": 0.0}
+generation_lock = threading.Lock()
+
+
+def canonical_price(value):
+    """
+    GPT-4o returns maximum_price as a number or a numeric string, both must map to the same key.
+    """
+    try:
+        return f"{float(value):.2f}"
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def result_cache_key(attributes, text, k, generation):
+    """
+    Canonical hash of everything that determines a recommendation: the filters, the embedding text,
+    the number of results, the search configuration and the catalogue generation. The embedding text only
+    carries the numeric attributes as buckets, so with re-ranking enabled their exact values are added too.
+    """
+    payload = json.dumps({
+        "maximum_price": canonical_price(attributes.get("maximum_price")),
+        "age_suitability": attributes.get("age_suitability"),
+        "gender": attributes.get("gender"),
+        "text": text,
+        "k": k,
+        "backend": settings.PRODUCT_SEARCH_BACKEND,
+        "field": settings.EMBEDDING_SEARCH_FIELD,
+        "rerank": settings.RERANK_ENABLED,
+        "numeric": profile_vector(attributes).tolist() if settings.RERANK_ENABLED else None,
+    }, sort_keys=True, default=str)
+    return f"{generation}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+async def catalog_generation():
+    """
+    Current catalogue generation, refreshed from the database at most every RESULT_CACHE_GENERATION_SECONDS.
+    Entries of older generations are never looked up again and age out of the LRU. A new generation also
+    makes the in-process search index re-check its fingerprint, so stale results are not cached under it.
+    """
+    now = time.monotonic()
+    if generation_state["generation"] is not None and now - generation_state["checked_at"] < settings.RESULT_CACHE_GENERATION_SECONDS:
+        return generation_state["generation"]
+
+    generation = await CatalogGeneration.acurrent()
+    with generation_lock:
+        if generation != generation_state["generation"]:
+            result_cache.clear()
+            search_engine.invalidate()
+        generation_state.update(generation=generation, checked_at=now)
+    return generation
+
+
+def result_cache_stats():
+    """
+    Hit-rate counters of the result cache and the generation it currently serves.
+    """
+    return {**result_cache.stats(), "generation": generation_state["generation"]}
@@ -0,0 +1,203 @@
+"""
+Rule-based intent router in front of GPT-4o. Turns whose answer is fully determined by the fixed option
+bubbles (the guided shopping target → age → gender → category → budget sequence) or by the previous
+results ("show me more") are resolved from the decision tables below; everything else goes to the LLM.
+The router never guesses: an attribute the shopper has not given is asked for with another set of options.
+"""
+import re
+
+
+# Guided answer to "Who are you shopping for?" → the profile filters it determines, the rest is asked for
+TARGETS = {
+    "mothers": {"age_suitability": "mothers", "gender": "female"},
+    "my baby": {},
+    "my child": {},
+    "gift for a child": {},
+    "gift for a baby": {},
+    "gift for a mother": {"age_suitability": "mothers", "gender": "female"},
+}
+
+# Age options offered per target, the values of Product.age_suitability
+BABY_AGES = ["0-5 months", "6-11 months", "1-1.5 years", "1.6-2 years"]
+CHILD_AGES = ["1.6-2 years", "3-5 years", "6-8 years", "9-12 years"]
+AGES = {
+    "my baby": BABY_AGES,
+    "gift for a baby": BABY_AGES,
+    "my child": CHILD_AGES,
+    "gift for a child": CHILD_AGES,
+}
+
+# Gender option → gender filter; "either" only matches unisex products, as the shopper asked
+GENDERS = {"boy": "male", "girl": "female", "either": "unisex"}
+
+# Category option → categories / usage_type of the profile
+CATEGORIES = {
+    "clothing": {"categories": ["Clothing"], "usage_type": "clothing"},
+    "toys": {"categories": ["Toys"], "usage_type": "playing"},
+    "diapers": {"categories": ["Diapering"], "usage_type": "diapering"},
+    "maternity": {"categories": ["Maternity"], "usage_type": "maternity care"},
+    "skin care": {"categories": ["Skin Care"], "usage_type": "skin care"},
+    "schooling": {"categories": ["Schooling"], "usage_type": "school use"},
+    "gear": {"categories": ["Gear"], "usage_type": "carrying and travelling"},
+    "accessories": {"categories": ["Accessories"], "usage_type": "accessories"},
+    "activity": {"categories": ["Activity"], "usage_type": "activities"},
+}
+
+# Same rule as SYSTEM_MESSAGE: no diapers for mothers or as a baby gift
+NO_DIAPERS = {"mothers", "gift for a baby", "gift for a mother"}
+
+# Budget option → maximum_price
+BUDGETS = {
+    "< rs. 2,500": 2500,
+    "< rs. 10,000": 10000,
+    "< rs. 25,000": 25000,
+    "< rs. 50,000": 50000,
+    "rs. 50,000+": 1000000,
+}
+
+MORE_COMMANDS = {"more", "show more", "show me more", "more options", "more results", "next", "show me more options"}
+
+# 0-10 scores of a routed profile: the midpoint, the guided answers say nothing about them
+DEFAULT_SCORES = {
+    "giftability": 5, "educational_value": 5, "durability": 5, "value_for_money": 5,
+    "safety_perception": 5, "sensitivity_level": 5, "portability": 5,
+}
+
+router_stats = {"routed": 0, "llm": 0, "intents": {}}
+
+
+def normalise(message):
+    return re.sub(r"\s+", " ", message).strip().lower().rstrip("!.?")
+
+
+def category_options(target):
+    options = [name.title() for name in CATEGORIES if not (name == "diapers" and target in NO_DIAPERS)]
+    return options + ["Start Over"]
+
+
+def age_options(target):
+    return [age.title() for age in AGES[target]] + ["Start Over"]
+
+
+def gender_options():
+    return ["Boy", "Girl", "Either", "Start Over"]
+
+
+def next_question(state):
+    """
+    The next guided question once the target is known: whichever of age and gender is still missing,
+    then the category.
+    """
+    if not state.get("age"):
+        return {"intent": "age", "response": "How old are they?", "options": age_options(state["target"])}
+    if not state.get("gender"):
+        return {"intent": "gender", "response": "Is it for a boy or a girl?", "options": gender_options()}
+    return {
+        "intent": "category",
+        "response": "Which category of products are you interested in?",
+        "options": category_options(state["target"]),
+    }
+
+
+def budget_options():
+    return ["< Rs. 2,500", "< Rs. 10,000", "< Rs. 25,000", "< Rs. 50,000", "Rs. 50,000+", "Start Over"]
+
+
+def guided_profile(state, maximum_price):
+    """
+    Complete product profile, in the SYSTEM_MESSAGE format, for the guided answers and a budget.
+    """
+    return {
+        **DEFAULT_SCORES,
+        "seasonal_use": [],
+        "waterproof": False,
+        "design_features": [],
+        "package_quantity": 1,
+        "material_origin": None,
+        "chemical_safety": "non-toxic",
+        "size": None,
+        "weight_range": None,
+        "count": None,
+        "color_options": None,
+        "brand": None,
+        "age_suitability": state["age"],
+        "gender": state["gender"],
+        **CATEGORIES[state["category"]],
+        "maximum_price": maximum_price,
+    }
+
+
+def follow_up_profiles(state):
+    """
+    Profiles the next click can request, once every guided answer but the budget is known: one per budget option.
+    """
+    if not all(state.get(name) for name in ("target", "age", "gender", "category")):
+        return []
+    return [guided_profile(state, maximum_price) for maximum_price in BUDGETS.values()]
+
+
+def route(message, state):
+    """
+    Resolves a turn without the LLM when the decision tables determine the answer.
+    @param message: The shopper's message.
+    @param state: Dictionary with is_free_flow, target, age, gender, category and last_profile from the session.
+    @return: None for free-form input, otherwise a dictionary with the intent, the response text and
+             the state updates, plus options, a profile to query or more=True to page the last results.
+    """
+    text = normalise(message)
+
+    if text in MORE_COMMANDS and state.get("last_profile"):
+        decision = {"intent": "more", "response": "Here are some more products you might like.", "more": True, "state": {}}
+
+    elif state.get("is_free_flow"):
+        decision = None
+
+    elif text in TARGETS and not state.get("target"):
+        known = TARGETS[text]
+        update = {"target": text, "age": known.get("age_suitability"), "gender": known.get("gender"), "category": None}
+        decision = {**next_question(update), "state": update}
+
+    elif state.get("target") and not state.get("age"):
+        decision = {**next_question({**state, "age": text}), "state": {"age": text}} if text in AGES[state["target"]] else None
+
+    elif state.get("target") and not state.get("gender"):
+        decision = {**next_question({**state, "gender": GENDERS[text]}), "state": {"gender": GENDERS[text]}} if text in GENDERS else None
+
+    elif text in CATEGORIES and state.get("target") and not state.get("category"):
+        if text == "diapers" and state["target"] in NO_DIAPERS:
+            decision = None
+        else:
+            decision = {
+                "intent": "category",
+                "response": "What is your budget?",
+                "options": budget_options(),
+                "state": {"category": text},
+            }
+
+    elif text in BUDGETS and state.get("target") and state.get("category"):
+        profile = guided_profile(state, BUDGETS[text])
+        decision = {
+            "intent": "budget",
+            "response": f"Here are the best {state['category'].title()} options I found within your budget.",
+            "profile": profile,
+            "state": {"target": None, "age": None, "gender": None, "category": None},
+        }
+
+    else:
+        decision = None
+
+    if decision is None:
+        router_stats["llm"] += 1
+    else:
+        router_stats["routed"] += 1
+        router_stats["intents"][decision["intent"]] = router_stats["intents"].get(decision["intent"], 0) + 1
+    return decision
+
+
+def router_stats_summary():
+    total = router_stats["routed"] + router_stats["llm"]
+    return {
+        **router_stats,
+        "intents": dict(router_stats["intents"]),
+        "hit_rate": round(router_stats["routed"] / total, 4) if total else 0.0,
+    }
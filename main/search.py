@@ -0,0 +1,311 @@
+import logging, re, threading, time
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import Count, Max, Value
+from django.db.models.functions import Coalesce, NullIf
+
+from .models import EMBEDDING_COMPACT_DIMENSIONS, Product
+from .rerank import NUMERIC_ATTRIBUTES, rerank, rerank_cards
+from .snapshot import current_version, load_snapshot
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IMAGE = "/static/images/logo.png"
+
+# Image of a result card, read from the denormalised primary_image column with the logo as fallback
+CARD_IMAGE = Coalesce(NullIf("primary_image", Value("")), Value(DEFAULT_IMAGE))
+
+
+def search_dimensions():
+    """
+    Number of dimensions of the embedding column selected by EMBEDDING_SEARCH_FIELD.
+    """
+    if settings.EMBEDDING_SEARCH_FIELD == "embedding_compact":
+        return EMBEDDING_COMPACT_DIMENSIONS
+    return settings.EMBEDDING_DIMENSIONS
+
+
+def load_catalog(*fields):
+    """
+    Reads `fields` of every active product that has an embedding in the search column.
+    @return: Tuple of the rows and the L2-normalised float32 matrix of their embeddings, in id order.
+    """
+    field = settings.EMBEDDING_SEARCH_FIELD
+    rows = list(
+        Product.objects.active().exclude(**{field: None}).annotate(image=CARD_IMAGE).order_by("id").values_list(*fields, field)
+    )
+
+    matrix = np.zeros((len(rows), search_dimensions()), dtype=np.float32)
+    for i, row in enumerate(rows):
+        # halfvec columns come back as HalfVector objects, vector columns as NumPy arrays
+        matrix[i] = row[-1].to_numpy() if hasattr(row[-1], "to_numpy") else row[-1]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.where(norms == 0, 1, norms)
+
+    return [row[:-1] for row in rows], matrix
+
+
+class VectorSearchEngine:
+    """
+    In-process alternative to the pgvector ordering in query_products.
+
+    All active embeddings are kept in one contiguous, L2-normalised float32 matrix, next to boolean masks
+    per age_suitability and gender and a sorted price array. A query is answered with a single matmul
+    over the catalogue followed by argpartition, without a database round trip.
+
+    When `snapshot_dir` is set the matrix is memory-mapped from the snapshot written by
+    `export_embedding_snapshot` instead of being loaded from the database, so every worker shares one copy.
+    """
+
+    def __init__(self, refresh_seconds=60, snapshot_dir=""):
+        self.refresh_seconds = refresh_seconds
+        self.snapshot_dir = snapshot_dir
+        self.lock = threading.Lock()
+        self.index = None           # Swapped as a whole so readers never see a half-built index
+        self.fingerprint = None
+        self.checked_at = 0.0
+
+    def catalog_fingerprint(self):
+        """
+        Cheap summary of the active catalogue that changes whenever products are added, removed or updated.
+        With a snapshot it is the snapshot version, so changes are served once they are exported.
+        """
+        if self.snapshot_dir and current_version(self.snapshot_dir):
+            return current_version(self.snapshot_dir)
+
+        summary = Product.objects.active().aggregate(count=Count("id"), updated=Max("updated_at"))
+        return summary["count"], summary["updated"]
+
+    def refresh(self):
+        """
+        Loads the catalogue on first use, and reloads it when the fingerprint has changed.
+        The fingerprint is checked at most once every `refresh_seconds`.
+        """
+        if self.index is not None and time.monotonic() - self.checked_at < self.refresh_seconds:
+            return
+
+        with self.lock:
+            if self.index is not None and time.monotonic() - self.checked_at < self.refresh_seconds:
+                return
+            fingerprint = self.catalog_fingerprint()
+            if self.index is None or fingerprint != self.fingerprint:
+                self.index = self.load()
+                self.fingerprint = fingerprint
+            self.checked_at = time.monotonic()
+
+    def invalidate(self):
+        """
+        Makes the next search re-check the fingerprint, without waiting for `refresh_seconds`.
+        """
+        self.checked_at = 0.0
+
+    def load(self):
+        """
+        Builds the matrix, filter masks and product cards from the active products.
+        """
+        if self.snapshot_dir and current_version(self.snapshot_dir):
+            return self.load_from_snapshot()
+
+        rows, matrix = load_catalog("url", "name", "current_price", "image", "age_suitability", "gender", *NUMERIC_ATTRIBUTES)
+
+        ages = np.array([row[4] for row in rows], dtype=object)
+        genders = np.array([row[5] for row in rows], dtype=object)
+
+        return self.build_index(
+            matrix=np.ascontiguousarray(matrix),
+            age_masks={age: ages == age for age in set(ages)},
+            gender_masks={gender: genders == gender for gender in set(genders)},
+            prices=np.array([float(row[2]) for row in rows], dtype=np.float64),
+            numeric=np.array([row[6:] for row in rows], dtype=np.float32).reshape(len(rows), len(NUMERIC_ATTRIBUTES)),
+            cards=[
+                {"url": row[0], "name": row[1], "current_price": row[2], "image": row[3]}
+                for row in rows
+            ],
+        )
+
+    def load_from_snapshot(self):
+        """
+        Maps the current snapshot read-only, startup only costs an mmap and the small filter columns.
+        """
+        snapshot = load_snapshot(self.snapshot_dir, current_version(self.snapshot_dir))
+        return self.build_index(
+            matrix=snapshot["matrix"],
+            age_masks={age: snapshot["age_codes"] == code for code, age in enumerate(snapshot["age_values"])},
+            gender_masks={gender: snapshot["gender_codes"] == code for code, gender in enumerate(snapshot["gender_values"])},
+            prices=np.asarray(snapshot["prices"]),
+            numeric=snapshot["numeric"],
+            cards=snapshot["cards"],
+        )
+
+    def build_index(self, matrix, age_masks, gender_masks, prices, numeric, cards):
+        price_order = np.argsort(prices, kind="stable")
+        return {
+            "matrix": matrix,
+            "age_masks": age_masks,
+            "gender_masks": gender_masks,
+            "price_order": price_order,
+            "sorted_prices": prices[price_order],
+            "numeric": numeric,
+            "cards": cards,
+        }
+
+    def search(self, embedding, attributes, k=8):
+        """
+        Returns the `k` products closest to `embedding` that pass the same filters as query_products.
+        @param embedding: Query embedding.
+        @param attributes: Product profile with maximum_price, age_suitability and gender.
+        @return: List of url/name/current_price/image dictionaries.
+        """
+        index = self.index
+        size = len(index["cards"])
+        if size == 0:
+            return []
+
+        none = np.zeros(size, dtype=bool)
+        mask = index["age_masks"].get(attributes["age_suitability"], none) & (
+            index["gender_masks"].get("unisex", none) | index["gender_masks"].get(attributes["gender"], none)
+        )
+        within_budget = np.searchsorted(index["sorted_prices"], float(attributes["maximum_price"]), side="right")
+        price_mask = none.copy()
+        price_mask[index["price_order"][:within_budget]] = True
+        mask &= price_mask
+
+        matches = int(mask.sum())
+        if matches == 0:
+            return []
+
+        # Shortened text-embedding-3 vectors are the truncated full vector, re-normalised
+        query = np.asarray(embedding, dtype=np.float32)[:index["matrix"].shape[1]]
+        query = query / (np.linalg.norm(query) or 1.0)
+
+        scores = index["matrix"] @ query
+        scores[~mask] = -np.inf
+
+        if settings.RERANK_ENABLED:
+            candidates = min(settings.RERANK_CANDIDATES, matches)
+            top = np.argpartition(-scores, candidates - 1)[:candidates]
+            top = top[rerank(scores[top], index["numeric"][top], attributes, k)]
+            return [dict(index["cards"][i]) for i in top]
+
+        k = min(k, matches)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [dict(index["cards"][i]) for i in top]
+
+    async def asearch(self, embedding, attributes, k=8):
+        await sync_to_async(self.refresh)()
+        return self.search(embedding, attributes, k)
+
+
+def lexical_query_text(attributes):
+    """
+    Builds a websearch_to_tsquery string that matches any of the brand, categories or usage_type words of a profile.
+    """
+    terms = [attributes.get("brand"), attributes.get("usage_type")]
+    categories = attributes.get("categories") or []
+    terms.extend(categories if isinstance(categories, list) else [categories])
+
+    words = []
+    for term in terms:
+        if term:
+            words.extend(re.findall(r"\w+", str(term)))
+    return " or ".join(dict.fromkeys(word.lower() for word in words))
+
+
+def hybrid_search(embedding, attributes, k=8):
+    """
+    Fuses the cosine ranking and the full-text ranking of the matching active products with reciprocal
+    rank fusion, in a single SQL query, so exact brand or product-type matches are not lost inside the embedding.
+    @param embedding: Query embedding.
+    @param attributes: Product profile with maximum_price, age_suitability, gender, brand, categories and usage_type.
+    @return: List of url/name/current_price/image dictionaries.
+    """
+    table = Product._meta.db_table
+    field = settings.EMBEDDING_SEARCH_FIELD
+    vector_type = "halfvec" if field == "embedding_compact" else "vector"
+
+    # Shortened text-embedding-3 vectors are the truncated full vector, re-normalised
+    query = np.asarray(embedding, dtype=np.float32)[:search_dimensions()]
+    query = query / (np.linalg.norm(query) or 1.0)
+    vector = "[" + ",".join(f"{value:.7g}" for value in query) + "]"
+
+    filters = "is_active AND current_price <= %(maximum_price)s AND age_suitability = %(age)s AND gender IN ('unisex', %(gender)s)"
+    sql = f"""
+        WITH vector_ranked AS (
+            SELECT id, ROW_NUMBER() OVER (ORDER BY {field} <=> %(vector)s::{vector_type}) AS rank
+            FROM {table}
+            WHERE {filters} AND {field} IS NOT NULL
+            ORDER BY {field} <=> %(vector)s::{vector_type}
+            LIMIT %(candidates)s
+        ),
+        lexical_ranked AS (
+            SELECT id, ROW_NUMBER() OVER (ORDER BY ts_rank_cd(search_vector, query) DESC) AS rank
+            FROM {table}, websearch_to_tsquery('english', %(text)s) AS query
+            WHERE {filters} AND search_vector @@ query
+            ORDER BY ts_rank_cd(search_vector, query) DESC
+            LIMIT %(candidates)s
+        ),
+        fused AS (
+            SELECT id, SUM(1.0 / (%(rrf_k)s + rank)) AS score
+            FROM (SELECT id, rank FROM vector_ranked UNION ALL SELECT id, rank FROM lexical_ranked) AS ranks
+            GROUP BY id
+        )
+        SELECT product.url, product.name, product.current_price, COALESCE(NULLIF(product.primary_image, ''), %(default_image)s),
+               fused.score, {", ".join(f"product.{name}" for name in NUMERIC_ATTRIBUTES)}
+        FROM fused JOIN {table} AS product ON product.id = fused.id
+        ORDER BY fused.score DESC
+        LIMIT %(limit)s
+    """
+    params = {
+        "vector": vector,
+        "text": lexical_query_text(attributes),
+        "maximum_price": attributes["maximum_price"],
+        "age": attributes["age_suitability"],
+        "gender": attributes["gender"],
+        "candidates": settings.HYBRID_CANDIDATES,
+        "rrf_k": settings.HYBRID_RRF_K,
+        "default_image": DEFAULT_IMAGE,
+        "limit": settings.RERANK_CANDIDATES if settings.RERANK_ENABLED else k,
+    }
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    cards = [{"url": row[0], "name": row[1], "current_price": row[2], "image": row[3]} for row in rows]
+    if settings.RERANK_ENABLED and rows:
+        return rerank_cards(cards, [row[4] for row in rows], [row[5:] for row in rows], attributes, k)
+    return cards
+
+
+search_engine = VectorSearchEngine(
+    refresh_seconds=settings.VECTOR_SEARCH_REFRESH_SECONDS,
+    snapshot_dir=settings.VECTOR_SNAPSHOT_DIR,
+)
+
+
+def warm_up():
+    """
+    Loads the in-process index when the server starts, so the first shopper request does not pay for
+    the catalogue load. Called from kiddoz/asgi.py and kiddoz/wsgi.py. The load runs on a thread of its own
+    and is waited for, because ASGI servers may import the application inside their event loop, where
+    synchronous ORM calls are refused. If it fails, the first request loads the index as before.
+    """
+    if settings.PRODUCT_SEARCH_BACKEND != "numpy":
+        return
+
+    def load():
+        try:
+            search_engine.refresh()
+            logger.info("Vector search index loaded at startup")
+        except Exception as e:
+            logger.warning("Vector search index not loaded at startup, the first search will load it: %s", e)
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=load, name="vector-search-warm-up")
+    thread.start()
+    thread.join()
@@ -0,0 +1,38 @@
+import logging
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Installed pgvector version, looked up on the first connection of the process
+pgvector_version = None
+
+
+def vector_version(cursor):
+    global pgvector_version
+    if pgvector_version is None:
+        cursor.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        row = cursor.fetchone()
+        pgvector_version = tuple(int(part) for part in row[0].split(".")[:2]) if row else (0, 0)
+    return pgvector_version
+
+
+def configure_vector_search(sender, connection, **kwargs):
+    """
+    Applies the HNSW query settings to every new database connection.
+    """
+    if connection.vendor != "postgresql":
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT set_config('hnsw.ef_search', %s, false)", [str(settings.HNSW_EF_SEARCH)])
+        if not settings.HNSW_ITERATIVE_SCAN:
+            return
+        if vector_version(cursor) < (0, 8):
+            # Without iterative scans the age, gender and price filters run on only ef_search candidates
+            logger.warning(
+                "pgvector %s does not support hnsw.iterative_scan, filtered searches may return fewer than k products. "
+                "Upgrade to pgvector 0.8+ or set PRODUCT_SEARCH_BACKEND=numpy.",
+                ".".join(map(str, pgvector_version)),
+            )
+            return
+        cursor.execute("SELECT set_config('hnsw.iterative_scan', %s, false)", [settings.HNSW_ITERATIVE_SCAN])
@@ -0,0 +1,106 @@
+import json, os, shutil
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+
+CURRENT = "current"  # Symlink to the snapshot workers should map
+
+
+def export_snapshot(root, keep=3):
+    """
+    Writes the active product embeddings and filter columns to a new versioned snapshot under `root`,
+    then atomically points `root/current` at it.
+    @param root: Directory holding the snapshot versions.
+    @param keep: Number of versions to keep on disk.
+    @return: Tuple of the new version and the number of products in it.
+    """
+    # Import here to avoid a circular import, search.py loads snapshots
+    from .rerank import NUMERIC_ATTRIBUTES
+    from .search import load_catalog
+
+    rows, matrix = load_catalog("id", "url", "name", "current_price", "image", "age_suitability", "gender", *NUMERIC_ATTRIBUTES)
+
+    ages = sorted({row[5] for row in rows})
+    genders = sorted({row[6] for row in rows})
+
+    version = timezone.now().strftime("%Y%m%dT%H%M%S%f")
+    os.makedirs(root, exist_ok=True)
+    staging = os.path.join(root, f".{version}.tmp")
+    os.makedirs(staging)
+
+    np.save(os.path.join(staging, "embeddings.npy"), matrix)
+    np.save(os.path.join(staging, "ids.npy"), np.array([row[0] for row in rows], dtype=np.int64))
+    np.save(os.path.join(staging, "prices.npy"), np.array([float(row[3]) for row in rows], dtype=np.float64))
+    np.save(os.path.join(staging, "age_codes.npy"), np.array([ages.index(row[5]) for row in rows], dtype=np.int16))
+    np.save(os.path.join(staging, "gender_codes.npy"), np.array([genders.index(row[6]) for row in rows], dtype=np.int16))
+    np.save(
+        os.path.join(staging, "numeric.npy"),
+        np.array([row[7:] for row in rows], dtype=np.float32).reshape(len(rows), len(NUMERIC_ATTRIBUTES)),
+    )
+
+    with open(os.path.join(staging, "cards.json"), "w", encoding="utf-8") as f:
+        json.dump([
+            {"url": row[1], "name": row[2], "current_price": str(row[3]), "image": row[4]}
+            for row in rows
+        ], f)
+
+    with open(os.path.join(staging, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "version": version,
+            "created_at": timezone.now().isoformat(),
+            "count": len(rows),
+            "field": settings.EMBEDDING_SEARCH_FIELD,
+            "dimensions": matrix.shape[1],
+            "age_values": ages,
+            "gender_values": genders,
+            "numeric_attributes": NUMERIC_ATTRIBUTES,
+        }, f)
+
+    # Publish: the directory rename and the symlink replace are both atomic
+    os.rename(staging, os.path.join(root, version))
+    link = os.path.join(root, f".{CURRENT}.tmp")
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(version, link)
+    os.replace(link, os.path.join(root, CURRENT))
+
+    # Workers that still map an old version keep their pages until they reload
+    versions = sorted(name for name in os.listdir(root) if not name.startswith(".") and name != CURRENT)
+    for old in versions[:-keep]:
+        shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+
+    return version, len(rows)
+
+
+def current_version(root):
+    """
+    Returns the version `root/current` points at, or None if no snapshot has been exported.
+    """
+    try:
+        return os.readlink(os.path.join(root, CURRENT))
+    except OSError:
+        return None
+
+
+def load_snapshot(root, version):
+    """
+    Maps a snapshot read-only. The embedding matrix is shared between processes through the page cache.
+    @return: Dictionary with the matrix, filter columns, numeric attributes and cards.
+    """
+    path = os.path.join(root, version)
+    with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    with open(os.path.join(path, "cards.json"), encoding="utf-8") as f:
+        cards = json.load(f)
+
+    return {
+        "matrix": np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r"),
+        "age_values": manifest["age_values"],
+        "gender_values": manifest["gender_values"],
+        "age_codes": np.load(os.path.join(path, "age_codes.npy"), mmap_mode="r"),
+        "gender_codes": np.load(os.path.join(path, "gender_codes.npy"), mmap_mode="r"),
+        "prices": np.load(os.path.join(path, "prices.npy"), mmap_mode="r"),
+        "numeric": np.load(os.path.join(path, "numeric.npy"), mmap_mode="r"),
+        "cards": cards,
+    }
@@ -101,8 +101,11 @@ document.addEventListener('DOMContentLoaded', () => {
         scrollToBottom();
         clearOptions();
 
+        // The bubble is created on the first streamed token and filled in as the reply arrives
+        let bubble = null;
+
         try {
-            const res = await fetch('chat/', {
+            const res = await fetch('chat/stream/', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
@@ -110,11 +113,37 @@ document.addEventListener('DOMContentLoaded', () => {
                 },
                 body: JSON.stringify({ message: message })
             });
-            const data = await res.json();
-            console.log(data);
-            showTyping(false);
-            appendMessage('bot', data.response, data.options, data.results);
-            scrollToBottom();
+            if (!res.ok || !res.body) {
+                throw new Error(`Chat stream failed with status ${res.status}`);
+            }
+
+            await readEventStream(res, (event, data) => {
+                console.log(event, data);
+                if (event === 'token') {
+                    if (!bubble) {
+                        showTyping(false);
+                        bubble = appendBubble('bot');
+                    }
+                    bubble.textContent += data.text;
+                } else if (event === 'response') {
+                    showTyping(false);
+                    if (bubble && typeof data.response === 'string') {
+                        bubble.innerHTML = data.response;
+                        disableInput(false);
+                        input.focus();
+                    } else {
+                        appendMessage('bot', data.response);
+                    }
+                } else if (event === 'options') {
+                    disableInput(true);
+                    showOptions(data.options, feedbackHandler);
+                } else if (event === 'results') {
+                    showResults(data.results);
+                } else if (event === 'error') {
+                    throw new Error(data.response);
+                }
+                scrollToBottom();
+            });
 
         } catch (err) {
             console.error(err);
@@ -133,6 +162,39 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    /**
+     * 
+     * @param {Response} res 
+     * @param {function} onEvent 
+     * @description: Reads a Server-Sent Events body from a fetch response and calls onEvent(event, data)
+     * for every complete event as soon as it arrives.
+     */
+    async function readEventStream(res, onEvent) {
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const frame = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let event = 'message';
+                let data = '';
+                frame.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) event = line.slice(6).trim();
+                    else if (line.startsWith('data:')) data += line.slice(5).trim();
+                });
+                if (data) onEvent(event, JSON.parse(data));
+            }
+        }
+    }
+
     // ── send message ──
     form.addEventListener('submit', (e) => {
         e.preventDefault();
@@ -194,6 +256,15 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    // ── empty bubble that streamed text is written into ──
+    function appendBubble(who) {
+        const msgEl = document.createElement('div');
+        msgEl.classList.add('message', who);
+        msgEl.innerHTML = `<div class="bubble px-4 py-2 ${who === 'user' ? 'text-end' : ''}"></div>`;
+        chatMsg.appendChild(msgEl);
+        return msgEl.querySelector('.bubble');
+    }
+
     function showResults(results) {
         const resultsEl = document.createElement('div');
         resultsEl.classList.add('d-flex', 'flex-nowrap', 'gap-3', 'overflow-auto', 'pb-1', 'mb-2');
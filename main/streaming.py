@@ -0,0 +1,68 @@
+import json, re
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+RESPONSE_FIELD = re.compile(r'"response"\s*:\s*"')
+JSON_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+def sse_event(event, data):
+    """
+    Formats a single Server-Sent Event with a JSON payload.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+class ResponseFieldExtractor:
+    """
+    Pulls the value of the top-level "response" string out of a JSON object that is still being streamed,
+    so the text can be shown to the shopper before the rest of the object (options, results) has arrived.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = None  # Index of the next unread character of the "response" value
+        self.finished = False
+
+    def feed(self, chunk):
+        """
+        Adds a streamed chunk and returns the newly decoded part of the "response" value (may be empty).
+        """
+        self.buffer += chunk
+        if self.finished:
+            return ""
+
+        if self.position is None:
+            match = RESPONSE_FIELD.search(self.buffer)
+            if not match:
+                return ""
+            self.position = match.end()
+
+        text = []
+        while self.position < len(self.buffer):
+            char = self.buffer[self.position]
+            if char == '"':
+                self.finished = True
+                break
+            if char != '\\':
+                text.append(char)
+                self.position += 1
+                continue
+
+            # Escape sequences may be split across chunks, so wait until they are complete
+            if self.position + 1 >= len(self.buffer):
+                break
+            escape = self.buffer[self.position + 1]
+            if escape == 'u':
+                if self.position + 6 > len(self.buffer):
+                    break
+                try:
+                    text.append(chr(int(self.buffer[self.position + 2:self.position + 6], 16)))
+                except ValueError:
+                    text.append(self.buffer[self.position:self.position + 6])
+                self.position += 6
+            else:
+                text.append(JSON_ESCAPES.get(escape, escape))
+                self.position += 2
+
+        return "".join(text)
@@ -0,0 +1,53 @@
+import json
+from django.test import SimpleTestCase
+
+from main.replies import outermost_object, repair_json
+
+
+REPLY = {"response": "Here you go", "options": ["Toys", "Start Over"]}
+
+
+class RepairJsonTests(SimpleTestCase):
+
+    def test_code_fences(self):
+        content = "```json\n" + json.dumps(REPLY) + "\n```"
+        self.assertEqual(repair_json(content), (REPLY, "strip_fences"))
+
+    def test_prose_around_the_object(self):
+        content = "Sure! Here is the JSON: " + json.dumps(REPLY) + " Let me know if you need more."
+        self.assertEqual(repair_json(content), (REPLY, "outermost_object"))
+
+    def test_trailing_commas(self):
+        content = '{"response": "Here you go", "options": ["Toys", "Start Over",],}'
+        self.assertEqual(repair_json(content), (REPLY, "trailing_commas"))
+
+    def test_fences_prose_and_trailing_commas_together(self):
+        content = '```json\nOK: {"response": "Here you go", "options": ["Toys", "Start Over",]}\n```'
+        self.assertEqual(repair_json(content), (REPLY, "trailing_commas"))
+
+    def test_braces_and_escaped_quotes_inside_strings(self):
+        reply = {"response": 'Try the "Play {Mat}" set}', "options": None}
+        content = "Reply: " + json.dumps(reply) + " {not json}"
+        self.assertEqual(repair_json(content), (reply, "outermost_object"))
+
+    def test_truncated_object_is_not_repaired(self):
+        self.assertEqual(repair_json('{"response": "Here you go", "options": ["Toys"'), (None, None))
+
+    def test_no_object(self):
+        self.assertEqual(repair_json("Sorry, I can't help with that."), (None, None))
+
+    def test_top_level_array_is_not_a_reply(self):
+        self.assertEqual(repair_json(json.dumps([REPLY])), (REPLY, "outermost_object"))
+        self.assertEqual(repair_json("[1, 2, 3]"), (None, None))
+
+
+class OutermostObjectTests(SimpleTestCase):
+
+    def test_first_balanced_object(self):
+        self.assertEqual(outermost_object('x {"a": {"b": 1}} {"c": 2}'), '{"a": {"b": 1}}')
+
+    def test_escaped_backslash_before_closing_quote(self):
+        self.assertEqual(outermost_object('{"a": "C:\\\\"} tail'), '{"a": "C:\\\\"}')
+
+    def test_unbalanced(self):
+        self.assertIsNone(outermost_object('{"a": {"b": 1}'))
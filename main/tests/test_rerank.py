@@ -0,0 +1,53 @@
+from django.test import SimpleTestCase
+
+from main.rerank import NUMERIC_ATTRIBUTES, rerank
+
+
+def row(**scores):
+    """Numeric attributes of a candidate, 5 where not given."""
+    return [scores.get(name, 5.0) for name in NUMERIC_ATTRIBUTES]
+
+
+class RerankTests(SimpleTestCase):
+    weights = {"giftability": 1.0}
+
+    def test_relevance_is_min_max_scaled_before_blending(self):
+        # Scaled relevance 1.0, 0.9, 0.0 and closeness to giftability 10 of 0.8, 1.0, 1.0 score 0.9, 0.95, 0.5
+        relevance = [0.80, 0.78, 0.60]
+        values = [row(giftability=2), row(giftability=10), row(giftability=10)]
+        order = rerank(relevance, values, {"giftability": 10}, k=3, weights=self.weights, alpha=0.5)
+        self.assertEqual(order.tolist(), [1, 0, 2])
+
+    def test_alpha_one_keeps_the_retrieval_order(self):
+        relevance = [0.2, 0.9, 0.5]
+        values = [row(giftability=10), row(giftability=0), row(giftability=5)]
+        order = rerank(relevance, values, {"giftability": 10}, k=3, weights=self.weights, alpha=1.0)
+        self.assertEqual(order.tolist(), [1, 2, 0])
+
+    def test_alpha_zero_orders_by_closeness(self):
+        relevance = [0.9, 0.5, 0.2]
+        values = [row(giftability=0), row(giftability=6), row(giftability=9)]
+        order = rerank(relevance, values, {"giftability": 10}, k=3, weights=self.weights, alpha=0.0)
+        self.assertEqual(order.tolist(), [2, 1, 0])
+
+    def test_equal_relevance_falls_back_to_closeness(self):
+        # No spread to scale: every candidate gets the same relevance and closeness decides
+        relevance = [0.7, 0.7, 0.7]
+        values = [row(giftability=2), row(giftability=9), row(giftability=6)]
+        order = rerank(relevance, values, {"giftability": 10}, k=3, weights=self.weights, alpha=0.7)
+        self.assertEqual(order.tolist(), [1, 2, 0])
+
+    def test_attributes_missing_from_the_profile_are_ignored(self):
+        relevance = [0.3, 0.9, 0.6]
+        values = [row(giftability=10), row(giftability=0), row(giftability=5)]
+        order = rerank(relevance, values, {"giftability": None}, k=3, weights=self.weights, alpha=0.5)
+        self.assertEqual(order.tolist(), [1, 2, 0])
+
+    def test_k_limits_and_clamps_the_result(self):
+        relevance = [0.1, 0.4, 0.3, 0.2]
+        values = [row()] * 4
+        self.assertEqual(rerank(relevance, values, {}, k=2, weights=self.weights, alpha=0.5).tolist(), [1, 2])
+        self.assertEqual(len(rerank(relevance, values, {}, k=10, weights=self.weights, alpha=0.5)), 4)
+
+    def test_no_candidates(self):
+        self.assertEqual(rerank([], [], {"giftability": 10}, k=8, weights=self.weights, alpha=0.5).tolist(), [])
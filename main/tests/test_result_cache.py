@@ -0,0 +1,52 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase, override_settings
+
+from main import result_cache
+from main.search import search_engine
+
+
+class CatalogGenerationTests(SimpleTestCase):
+
+    def setUp(self):
+        result_cache.generation_state.update(generation=None, checked_at=0.0)
+        self.addCleanup(result_cache.generation_state.update, generation=None, checked_at=0.0)
+        self.addCleanup(setattr, search_engine, "checked_at", 0.0)
+
+    def read_generation(self, generation):
+        result_cache.generation_state["checked_at"] = 0.0
+        with mock.patch.object(result_cache.CatalogGeneration, "acurrent", mock.AsyncMock(return_value=generation)):
+            return async_to_sync(result_cache.catalog_generation)()
+
+    def test_new_generation_clears_results_and_rechecks_the_search_index(self):
+        self.read_generation(1)
+        result_cache.result_cache.set("1:key", ["card"])
+        search_engine.checked_at = 1e12
+
+        self.assertEqual(self.read_generation(2), 2)
+        self.assertEqual(len(result_cache.result_cache), 0)
+        self.assertEqual(search_engine.checked_at, 0.0)
+
+    def test_same_generation_keeps_the_search_index_timer(self):
+        self.read_generation(1)
+        search_engine.checked_at = 1e12
+        self.read_generation(1)
+        self.assertEqual(search_engine.checked_at, 1e12)
+
+
+class ResultCacheKeyTests(SimpleTestCase):
+
+    PROFILE = {"maximum_price": 5000, "age_suitability": "3-5", "gender": "unisex", "giftability": 7, "durability": "8"}
+
+    def key(self, **changes):
+        return result_cache.result_cache_key({**self.PROFILE, **changes}, "text", 8, 1)
+
+    @override_settings(RERANK_ENABLED=True)
+    def test_numeric_attributes_within_one_bucket_change_the_key_when_reranking(self):
+        self.assertNotEqual(self.key(giftability=7), self.key(giftability=8))
+        self.assertEqual(self.key(durability="8"), self.key(durability=8.0))
+
+    @override_settings(RERANK_ENABLED=False)
+    def test_numeric_attributes_only_matter_through_the_text_without_reranking(self):
+        self.assertEqual(self.key(giftability=7), self.key(giftability=8))
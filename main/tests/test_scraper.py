@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+from django.test import SimpleTestCase
+
+
+PAGE = """
+<html><head><title>Wooden Train Set - Kiddoz.lk</title></head><body>
+<h2 class="page-title"><span>Wooden Train Set</span></h2>
+<div class="product attribute overview"><ul>
+<li>Twelve wooden pieces</li><li>Magnetic couplings</li><li>Non-toxic paint</li>
+<li>Ages 3 and up</li><li>Twelve wooden pieces</li>
+</ul></div>
+<div class="product-highlights"><ul><li>Gift boxed</li><li>Magnetic couplings</li></ul></div>
+</body></html>
+"""
+
+SCRIPT = """
+import sys
+import django
+django.setup()
+from bs4 import BeautifulSoup
+from main.management.commands.kiddoz_scraper import DataProcessor, ProductParser, payload_hash
+parser = ProductParser.create_parser(BeautifulSoup(sys.stdin.read(), 'html.parser'), 'https://kiddoz.lk/wooden-train-set')
+print(payload_hash(DataProcessor.process_product_data(parser.parse())))
+"""
+
+
+class PayloadHashTests(SimpleTestCase):
+
+    def hash_with_seed(self, seed):
+        env = dict(os.environ, PYTHONHASHSEED=str(seed))
+        result = subprocess.run(
+            [sys.executable, '-c', SCRIPT], input=PAGE, env=env,
+            capture_output=True, text=True, check=True,
+        )
+        return result.stdout.strip().splitlines()[-1]
+
+    def test_same_page_hashes_the_same_across_runs(self):
+        hashes = {self.hash_with_seed(seed) for seed in (0, 1, 2, 3)}
+        self.assertEqual(len(hashes), 1)
@@ -0,0 +1,42 @@
+from django.test import SimpleTestCase
+
+from main.streaming import ResponseFieldExtractor
+
+
+def extract(*chunks):
+    """Feeds the chunks in order and returns the text decoded after each one."""
+    extractor = ResponseFieldExtractor()
+    return [extractor.feed(chunk) for chunk in chunks]
+
+
+class ResponseFieldExtractorTests(SimpleTestCase):
+
+    def test_single_chunk(self):
+        self.assertEqual(extract('{"response": "Hello there", "options": ["A"]}'), ["Hello there"])
+
+    def test_character_by_character(self):
+        content = '{"response": "Hi \\"you\\"\\n\\u00e9", "results": null}'
+        self.assertEqual("".join(extract(*content)), 'Hi "you"\né')
+
+    def test_key_split_across_chunks(self):
+        self.assertEqual(extract('{"resp', 'onse"', ' : "', 'ok"}'), ["", "", "", "ok"])
+
+    def test_escaped_quote_split_after_the_backslash(self):
+        self.assertEqual(extract('{"response": "Say \\', '"hi\\', '" now"}'), ["Say ", '"hi', '" now'])
+
+    def test_unicode_escape_split(self):
+        self.assertEqual(extract('{"response": "caf\\u00', 'e9!"}'), ["caf", "é!"])
+
+    def test_invalid_unicode_escape_is_kept_as_text(self):
+        self.assertEqual(extract('{"response": "a\\uZZZZb"}'), ["a\\uZZZZb"])
+
+    def test_stops_at_the_closing_quote(self):
+        self.assertEqual(extract('{"response": "Done", "options": ', '["A", "response"]}'), ["Done", ""])
+
+    def test_response_after_other_fields(self):
+        self.assertEqual(extract('{"options": ["Toys"], ', '"response": "Pick one"}'), ["", "Pick one"])
+
+    def test_truncated_stream(self):
+        extractor = ResponseFieldExtractor()
+        self.assertEqual(extractor.feed('{"response": "Half a sen'), "Half a sen")
+        self.assertFalse(extractor.finished)
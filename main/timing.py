@@ -0,0 +1,117 @@
+import bisect, json, logging, threading, time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+logger = logging.getLogger("main.timing")
+
+# Stage durations of the request being handled, as a list of (stage, seconds). None outside a request.
+request_spans = ContextVar("request_spans", default=None)
+
+# Upper bounds of the histogram buckets, in milliseconds (the last bucket is unbounded)
+BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+
+class StageHistogram:
+    """
+    Fixed-bucket latency histogram of one stage, aggregated over every request this worker has handled.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, duration_ms):
+        self.counts[bisect.bisect_left(BUCKETS_MS, duration_ms)] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+
+    def quantile(self, q):
+        """
+        Upper bound of the bucket holding the q-th quantile (the observed maximum for the last bucket).
+        """
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(BUCKETS_MS[i], self.max_ms) if i < len(BUCKETS_MS) else self.max_ms
+        return 0.0
+
+    def stats(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max_ms, 2),
+            "buckets": {
+                **{f"le_{bound}": count for bound, count in zip(BUCKETS_MS, self.counts)},
+                "le_inf": self.counts[-1],
+            },
+        }
+
+
+histograms = {}
+histograms_lock = threading.Lock()
+
+
+def observe(stage, seconds):
+    with histograms_lock:
+        histograms.setdefault(stage, StageHistogram()).observe(seconds * 1000)
+
+
+@contextmanager
+def span(stage):
+    """
+    Times the enclosed block as `stage` of the current request and of the stage histograms.
+    Safe to use inside async functions as long as the awaits are inside the block.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        spans = request_spans.get()
+        if spans is not None:
+            spans.append((stage, duration))
+        observe(stage, duration)
+
+
+def summarise(spans):
+    """
+    Total seconds per stage, in the order the stages first ran.
+    """
+    totals = {}
+    for stage, duration in spans:
+        totals[stage] = totals.get(stage, 0.0) + duration
+    return totals
+
+
+def server_timing_header(totals):
+    return ", ".join(f"{stage};dur={duration * 1000:.1f}" for stage, duration in totals.items())
+
+
+def log_request(request, status, spans, total):
+    """
+    Writes one structured line per request with the time spent in every stage.
+    """
+    logger.info(json.dumps({
+        "method": request.method,
+        "path": request.path,
+        "status": status,
+        "total_ms": round(total * 1000, 1),
+        "stages_ms": {stage: round(duration * 1000, 1) for stage, duration in summarise(spans).items()},
+    }))
+
+
+def timing_stats():
+    """
+    Per-stage latency histograms of this worker process.
+    """
+    with histograms_lock:
+        return {stage: histogram.stats() for stage, histogram in sorted(histograms.items())}
@@ -6,5 +6,7 @@ urlpatterns = [
     path("", views.home, name="home"),
     path("set-choice/", views.set_choice, name="set_choice"),
     path("chat/", views.chat, name="chat"),
+    path("chat/stream/", views.chat_stream, name="chat_stream"),
     path("privacy-policy/", views.privacy_policy, name="privacy_policy"),
+    path("metrics/", views.metrics, name="metrics"),
 ]
\ No newline at end of file
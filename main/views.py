@@ -1,13 +1,27 @@
-import json, time, os, unicodedata
+import json, asyncio, os, unicodedata
 from django.shortcuts import render
 from django.http import HttpResponse
 from django.views.decorators.http import require_POST
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.db.models import Q
+from pgvector import HalfVector
 from pgvector.django import CosineDistance
 
-from openai import OpenAI
-from .models import Product
+from openai import AsyncOpenAI, NOT_GIVEN
+from .context_window import conversation_window
+from .conversation import prompt_version, append_turns, load_turns, storage_stats_summary
+from .embeddings import get_embedding, embedding_cache_stats, shorten_embedding
+from .models import EMBEDDING_COMPACT_DIMENSIONS, Product
+from .rerank import NUMERIC_ATTRIBUTES, rerank_cards
+from .replies import reply_response_format, repair_json, repair_stats, repair_stats_summary
+from .prefetch import schedule_prefetch, mark_prefetched, record_hit, prefetch_stats_summary
+from .router import route, follow_up_profiles, router_stats_summary
+from .result_cache import result_cache, result_cache_key, catalog_generation, result_cache_stats
+from .search import search_engine, hybrid_search, CARD_IMAGE
+from .streaming import ResponseFieldExtractor, sse_event
+from .timing import span, timing_stats
 
 
 GUIDED_QUESTIONS = [
@@ -48,6 +62,8 @@ GUIDED_QUESTIONS = [
     # }
 ]
 
+RESET_COMMANDS = ["reset", "clear", "restart", "start over", "new", "new chat", "new conversation"]
+
 SYSTEM_MESSAGE = {
     "role": "system",
     "content": """You are a smart, friendly, and highly capable shopping assistant for Kiddoz — a Sri Lankan e-commerce store specializing in products for babies, children (0 months to 12 years), mothers, and all ages. Your job is to help users find the best products through engaging, natural conversations that adapt to their needs.
@@ -145,12 +161,17 @@ SYSTEM_MESSAGE = {
 }
 
 
-# Initialize OpenAI API client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))   
+# Conversations store the system prompt by version; keep old versions here while their conversations are live
+SYSTEM_PROMPT_VERSION = prompt_version(SYSTEM_MESSAGE)
+SYSTEM_PROMPTS = {SYSTEM_PROMPT_VERSION: SYSTEM_MESSAGE}
+
+
+# Initialize OpenAI API client (OPENAI_BASE_URL points it at the mock server for load tests)
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))   
 
 # Create your views here.
-def home(request):
-    reset_chat(request)  # Reset chat when the home page is loaded
+async def home(request):
+    await reset_chat(request)  # Reset chat when the home page is loaded
     return render(request, "main/home.html")
 
 def privacy_policy(request):
@@ -159,25 +180,39 @@ def privacy_policy(request):
     """
     return render(request, "main/privacy_policy.html")
 
+async def metrics(request):
+    """
+    Return the runtime counters of this worker process as JSON.
+    """
+    return JsonResponse({
+        "embedding_cache": embedding_cache_stats(),
+        "result_cache": result_cache_stats(),
+        "json_repair": repair_stats_summary(),
+        "router": router_stats_summary(),
+        "prefetch": prefetch_stats_summary(),
+        "conversation_storage": storage_stats_summary(),
+        "stages": timing_stats(),
+    })
+
 @require_POST
-def set_choice(request):
+async def set_choice(request):
     try:
         data = json.loads(request.body)
         message = data.get("message", "")
 
-        add_message(request, "assistant", "Hi there! How would you like the conversation to go?")        
+        await add_message(request, "assistant", "Hi there! How would you like the conversation to go?")
 
         if message == "Free Flow":
-            add_message(request, "user", "Free Flow")
-            request.session['is_free_flow'] = True
+            await add_message(request, "user", "Free Flow")
+            await request.session.aset('is_free_flow', True)
             response = "Go Ahead, type what you want and I will try my best to help you!"
-            add_message(request, "assistant", response)
+            await add_message(request, "assistant", response)
             return JsonResponse({"success": True, "response": response})
         
         elif message == "Guided Questions":
-            add_message(request, "user", "Guided Questions")
-            add_message(request, "assistant", "Let's get started")
-            add_message(request, "assistant", GUIDED_QUESTIONS[0]["question"])
+            await add_message(request, "user", "Guided Questions")
+            await add_message(request, "assistant", "Let's get started")
+            await add_message(request, "assistant", GUIDED_QUESTIONS[0]["question"])
             return JsonResponse({"success": True, 
                                  "response":["Let's get started", GUIDED_QUESTIONS[0]["question"]], 
                                  "options": GUIDED_QUESTIONS[0]["options"]
@@ -190,44 +225,122 @@ def set_choice(request):
 
 
 @require_POST
-def chat(request):
-    time.sleep(1)  # Simulate processing time
+async def chat(request):
+    await asyncio.sleep(1)  # Simulate processing time without holding the event loop
     try:
         data = json.loads(request.body)
         message = data.get("message", "")
-        add_message(request, "user", message)
+        await add_message(request, "user", message)
 
-        if message.lower() in ["reset", "clear", "restart", "start over", "new", "new chat", "new conversation"]:
-            reset_chat(request)
+        if message.lower() in RESET_COMMANDS:
+            await reset_chat(request)
             return JsonResponse({"success": True, "response": "Chat reset. You can start over."})
             
-        is_free_flow = request.session.get("is_free_flow", False)
+        is_free_flow = await request.session.aget("is_free_flow", False)
         if is_free_flow:
             # Handle free flow chat logic here
-            response = handle_free_flow(request, message)
+            response = await handle_free_flow(request, message)
         else:
             # Handle guided questions logic here
-            response = handle_guided_questions(request, message)
+            response = await handle_guided_questions(request, message)
         return JsonResponse(response)
     except json.JSONDecodeError:
         return HttpResponse(status=400, content="Invalid JSON format")
 
+
+@require_POST
+async def chat_stream(request):
+    """
+    Same conversation turn as `chat`, but streamed as Server-Sent Events so the reply can be painted
+    while GPT-4o is still generating it.
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return HttpResponse(status=400, content="Invalid JSON format")
+
+    response = StreamingHttpResponse(chat_events(request, data.get("message", "")), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # Stop nginx from buffering the stream
+    return response
+
+
+async def chat_events(request, message):
+    """
+    Yields the events of one streamed turn:
+        token    — the next piece of the "response" text as GPT-4o produces it
+        response — the complete response text once the reply has been parsed
+        options  — the option bubbles, if any
+        results  — the recommended product cards, once the database query has finished
+        done / error
+    """
+    try:
+        await add_message(request, "user", message)
+
+        is_free_flow = await request.session.aget("is_free_flow", False)
+        question_counter = await request.session.aget("question_counter", 0)
+
+        if message.lower() in RESET_COMMANDS:
+            await reset_chat(request)
+            yield sse_event("response", {"response": "Chat reset. You can start over."})
+
+        elif not is_free_flow and question_counter < len(GUIDED_QUESTIONS)-1:
+            # The next guided question is fixed, there is nothing to stream
+            output = await handle_guided_questions(request, message)
+            yield sse_event("response", {"response": output["response"]})
+            yield sse_event("options", {"options": output["options"]})
+
+        elif (output := await route_turn(request, message)) is not None:
+            # Resolved from the router's decision tables, there is nothing to stream
+            yield sse_event("response", {"response": output["response"]})
+            if output.get("options"):
+                yield sse_event("options", {"options": output["options"]})
+            if "results" in output:
+                yield sse_event("results", {"results": output["results"]})
+
+        else:
+            response = {}
+            async for kind, value in stream_gpt_response(request):
+                if kind == "token":
+                    yield sse_event("token", {"text": value})
+                else:
+                    response = value
+
+            await add_message(request, "assistant", response.get("response"), response.get("results"))
+            yield sse_event("response", {"response": response.get("response")})
+
+            if response.get("options"):
+                yield sse_event("options", {"options": response.get("options")})
+
+            if response.get("results"):
+                products = await recommend(request, response.get("results"))
+                yield sse_event("results", {"results": products})
+
+        # The session middleware has already saved the session by the time the stream runs
+        await request.session.asave()
+        yield sse_event("done", {})
+    except Exception as e:
+        print(f"Error: {e}")
+        yield sse_event("error", {"response": "Sorry, I couldn't process your request."})
+
     
-def handle_free_flow(request, message):
+async def handle_free_flow(request, message):
+    routed = await route_turn(request, message)
+    if routed is not None:
+        return routed
 
-    response = gpt_response(request)
+    response = await gpt_response(request)
     output = {
         "success": True,
         "response": response.get("response"),
     }
 
-    add_message(request, "assistant", response.get("response") , response.get("results"))
+    await add_message(request, "assistant", response.get("response") , response.get("results"))
 
     # Need to query for products with the above attributes
     if response.get("results"):
         # Query the database for products matching the attributes
-        products = query_products(response.get("results"))[:10]
-        output["results"] = products
+        output["results"] = await recommend(request, response.get("results"))
 
     if response.get("options"):
         output["options"] = response.get("options")
@@ -235,19 +348,23 @@ def handle_free_flow(request, message):
     return output
     
     
-def handle_guided_questions(request, message):
-    question_counter = request.session.get("question_counter", 0)
+async def handle_guided_questions(request, message):
+    question_counter = await request.session.aget("question_counter", 0)
 
     if question_counter < len(GUIDED_QUESTIONS)-1:
         question_counter += 1
         response = GUIDED_QUESTIONS[question_counter]["question"]
         options = GUIDED_QUESTIONS[question_counter]["options"]
-        add_message(request, "assistant", response)
-        request.session["question_counter"] = question_counter
+        await add_message(request, "assistant", response)
+        await request.session.aset("question_counter", question_counter)
         return {"success": True, "response": response, "options": options}
     else:
-        response = gpt_response(request)
-        add_message(request, "assistant", response.get("response") , response.get("results"))
+        routed = await route_turn(request, message)
+        if routed is not None:
+            return routed
+
+        response = await gpt_response(request)
+        await add_message(request, "assistant", response.get("response") , response.get("results"))
         output = {
             "success": True,
             "response": response.get("response"),
@@ -256,8 +373,7 @@ def handle_guided_questions(request, message):
         # Need to query for products with the above attributes
         if response.get("results"):
             # Query the database for products matching the attributes
-            products = query_products(response.get("results"))[:10]
-            output["results"] = products
+            output["results"] = await recommend(request, response.get("results"))
 
         if response.get("options"):
             output["options"] = response.get("options")
@@ -265,17 +381,109 @@ def handle_guided_questions(request, message):
         return output
     
 
-def query_products(attributes):
+async def route_turn(request, message):
+    """
+    Answers the turn from the intent router's decision tables without GPT-4o.
+    @return: The same output dictionary as handle_free_flow, or None when the turn needs the LLM.
+    """
+    router_state = await request.session.aget("router_state", {})
+    decision = route(message, {
+        **router_state,
+        "is_free_flow": await request.session.aget("is_free_flow", False),
+        "last_profile": await request.session.aget("last_profile"),
+    })
+    if decision is None:
+        return None
+
+    router_state = {**router_state, **decision["state"]}
+    await request.session.aset("router_state", router_state)
+    output = {"success": True, "response": decision["response"]}
+
+    if decision.get("profile"):
+        output["results"] = await recommend(request, decision["profile"])
+    elif decision.get("more"):
+        output["results"] = await recommend_more(request)
+        if not output["results"]:
+            output["response"] = "That's everything I found for these preferences. Try a different budget or category."
+
+    if decision.get("options"):
+        output["options"] = decision["options"]
+        # Every option of the next click maps to a known profile, warm their results while the shopper reads
+        await schedule_prefetch(
+            request, follow_up_profiles(router_state), lambda profile: query_products(profile, speculative=True)
+        )
+
+    await add_message(request, "assistant", output["response"], decision.get("profile"))
+    return output
+
+
+async def recommend(request, attributes):
+    """
+    Queries the products for a profile and remembers it so "show me more" can page through the results.
+    """
+    if type(attributes) is list:
+        attributes = attributes[0]
+
+    products = (await query_products(attributes))[:10]
+    await request.session.aset("last_profile", attributes)
+    await request.session.aset("results_shown", len(products))
+    return products
+
+
+async def recommend_more(request, page_size=8):
+    """
+    The next page of products for the last recommended profile.
+    """
+    shown = await request.session.aget("results_shown", 0)
+    products = (await query_products(await request.session.aget("last_profile"), k=shown + page_size))[shown:]
+    await request.session.aset("results_shown", shown + len(products))
+    return products
+
+
+async def query_products(attributes, k=8, speculative=False):
     """
     Query the database for products matching the given attributes.
     @param attributes: Dictionary containing product attributes.
+    @param k: Number of products to return.
+    @param speculative: True when called by a prefetch rather than a shopper.
     @return: List of products matching the attributes.
     """
     if type(attributes) is list:
         attributes = attributes[0]
-    
 
-    text = f"""GIFTABILITY OF THE PRODUCT {bucket_score(attributes['giftability'])}; educational_value {bucket_score(attributes['educational_value'])}; 
+    text = embedding_text(attributes)
+
+    # Shoppers often converge on the same profile, so the cards are cached per catalogue generation
+    key = result_cache_key(attributes, text, k, await catalog_generation())
+    cached = result_cache.get(key)
+    if cached is not None:
+        if not speculative:
+            record_hit(key)
+        return [dict(product) for product in cached]
+
+    with span("embedding"):
+        embedding_data = await get_embedding(text)
+
+    with span("search"):
+        if settings.PRODUCT_SEARCH_BACKEND == "numpy":
+            products = await search_engine.asearch(embedding_data, attributes, k=k)
+        elif settings.PRODUCT_SEARCH_BACKEND == "hybrid":
+            products = await sync_to_async(hybrid_search)(embedding_data, attributes, k=k)
+        else:
+            products = await pgvector_search(embedding_data, attributes, k=k)
+
+    result_cache.set(key, [dict(product) for product in products])
+    if speculative:
+        mark_prefetched(key)
+
+    print("PRODUCTS RECOMMENDATION:\n",products, "\n")
+    return products  # Return the first 5 products for demonstration
+
+def embedding_text(attributes):
+    """
+    Builds the text that is embedded for a product profile, mirroring save_embedding in infer_attributes.
+    """
+    return f"""GIFTABILITY OF THE PRODUCT {bucket_score(attributes['giftability'])}; educational_value {bucket_score(attributes['educational_value'])}; 
         durability {bucket_score(attributes['durability'])}; value_for_money {bucket_score(attributes['value_for_money'])}; 
         safety_perception {bucket_score(attributes['safety_perception'])}; SEASONAL_USE OF THE PRODUCT {attributes['seasonal_use']}; 
         sensitivity_level {bucket_score(attributes['sensitivity_level'])}; waterproof {attributes['waterproof']}; 
@@ -286,82 +494,140 @@ def query_products(attributes):
         color_availability {attributes['color_options']}; categories {attributes['categories']}
     """
 
-    response = client.embeddings.create(
-        input=text,
-        model="text-embedding-3-small",
-        dimensions=1536
-    ) 
+async def pgvector_search(embedding_data, attributes, k=8):
+    """
+    Orders the matching active products by cosine distance inside Postgres.
+    """
+    if settings.EMBEDDING_SEARCH_FIELD == "embedding_compact":
+        similarity = CosineDistance(
+            "embedding_compact", HalfVector(shorten_embedding(embedding_data, EMBEDDING_COMPACT_DIMENSIONS))
+        )
+    else:
+        similarity = CosineDistance("embedding", embedding_data)
 
-    embedding_data = response.data[0].embedding
-    products = Product.objects.active().annotate(
-        similarity=CosineDistance("embedding", embedding_data)
+    queryset = Product.objects.active().annotate(
+        similarity=similarity
     ).filter(
         current_price__lte=attributes['maximum_price'],
         age_suitability=attributes['age_suitability'],
     ).filter(
         Q(gender="unisex") | Q(gender=attributes['gender'])
-    ).order_by("similarity").values('url', 'name', 'current_price', 'image_urls').distinct()[:8]
-
-    for product in products:
-        # Make sure image_urls is a list
-        image_list = []
-        if isinstance(product['image_urls'], str):
-            try:
-                image_list = json.loads(product['image_urls'])
-            except json.JSONDecodeError:
-                image_list = []
-        elif isinstance(product['image_urls'], list):
-            image_list = product['image_urls']
-    
+    ).annotate(
+        image=CARD_IMAGE
+    ).order_by("similarity")
+
+    if not settings.RERANK_ENABLED:
+        queryset = queryset.values('url', 'name', 'current_price', 'image').distinct()[:k]
+        return [product async for product in queryset]
+
+    # Pull a wider candidate set with its numeric attributes and let the re-ranker pick the best k
+    rows = [
+        row async for row in queryset.values_list(
+            'url', 'name', 'current_price', 'image', 'similarity', *NUMERIC_ATTRIBUTES
+        )[:settings.RERANK_CANDIDATES]
+    ]
+    cards = [{"url": row[0], "name": row[1], "current_price": row[2], "image": row[3]} for row in rows]
+    return rerank_cards(cards, [1 - row[4] for row in rows], [row[5:] for row in rows], attributes, k)
+
+async def gpt_response(request):
+    messages = await conversation_messages(request)
+    print(messages[1:])
+    try:
+        with span("gpt"):
+            response = await client.chat.completions.create(
+                model="gpt-4o",
+                messages=messages,
+                max_tokens=2048,
+                response_format=reply_response_format() or NOT_GIVEN,
+                # temperature=0.8,
+            )
+        content = response.choices[0].message
+        # Now parse it as JSON
+        # print("\nGPT RAW RESPONSE:\n", content, "\n")
+        return await parse_gpt_content(content.content)
+    except Exception as e:
+        print(f"Error: {e}")
+        return "Sorry, I couldn't process your request."
 
-        # Add new key 'image' with the first image if available
-        product['image'] = image_list[0] if image_list else "/static/images/logo.png"
-        # Remove the original 'image_urls' key
-        del product['image_urls']
 
-    print("PRODUCTS RECOMMENDATION:\n",products, "\n")
-    return products  # Return the first 5 products for demonstration
+async def stream_gpt_response(request):
+    """
+    Streams a GPT-4o reply for the conversation so far.
+    Yields ("token", text) for every new piece of the "response" field and finally ("parsed", dict)
+    once the whole JSON object has arrived.
+    """
+    messages = await conversation_messages(request)
+    extractor = ResponseFieldExtractor()
+    content = []
 
-def gpt_response(request):
-    print(request.session["messages"][1:])
-    try:
-        response = client.chat.completions.create(
+    with span("gpt"):
+        stream = await client.chat.completions.create(
             model="gpt-4o",
-            messages=request.session["messages"],
+            messages=messages,
             max_tokens=2048,
-            # temperature=0.8,
+            response_format=reply_response_format() or NOT_GIVEN,
+            stream=True,
         )
-        content = response.choices[0].message
-        # Now parse it as JSON
-        # print("\nGPT RAW RESPONSE:\n", content, "\n")
-        try:
-            parsed_response = json.loads(content.content)
-        except json.JSONDecodeError:
-            # If GPT didn't send perfect JSON (very rare with your system message now), handle the error
-            print("GPT response is not valid JSON. Attempting to parse as a string.")
 
-            parsed_response = ai_jsonify_string(content.content)
+        async for chunk in stream:
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            delta = chunk.choices[0].delta.content
+            content.append(delta)
+            text = extractor.feed(delta)
+            if text:
+                yield "token", text
 
-        # print("GPT RESPONSE:\n", content, "\n")
-        print("\nGPT JSON RESPONSE:\n", parsed_response, "\n")
-        return parsed_response
-    except Exception as e:
-        print(f"Error: {e}")
-        return "Sorry, I couldn't process your request."
+    yield "parsed", await parse_gpt_content("".join(content))
 
 
-def reset_chat(request):
-    request.session["is_free_flow"] = False
-    request.session["question_counter"] = 0
-    request.session["messages"] = [SYSTEM_MESSAGE]
+async def parse_gpt_content(content):
+    """
+    Parses the raw text of a GPT reply into the response/options/results dictionary.
+    """
+    try:
+        parsed_response = json.loads(content)
+        repair_stats["valid"] += 1
+    except json.JSONDecodeError:
+        # If GPT didn't send perfect JSON (very rare with structured outputs), try the local fixes first
+        parsed_response, step = repair_json(content)
+        if parsed_response is not None:
+            repair_stats[step] += 1
+        else:
+            print("GPT response is not valid JSON. Attempting to parse as a string.")
+            parsed_response = await ai_jsonify_string(content)
+            repair_stats["remote" if isinstance(parsed_response, dict) else "failed"] += 1
+
+    # print("GPT RESPONSE:\n", content, "\n")
+    print("\nGPT JSON RESPONSE:\n", parsed_response, "\n")
+    return parsed_response
+
 
+async def reset_chat(request):
+    await request.session.aset("is_free_flow", False)
+    await request.session.aset("question_counter", 0)
+    await request.session.aset("conversation_id", None)  # The next message starts a new conversation log
+    await request.session.apop("messages", None)          # Inline history of sessions from before the log
+    await request.session.aset("router_state", {})
+    await request.session.aset("last_profile", None)
+    await request.session.aset("results_shown", 0)
 
-def add_message(request, role, content, results=None):
-    messages = request.session.get("messages", [])
-    messages.append({"role": role, "content": content})
+
+async def add_message(request, role, content, results=None):
+    turns = [(role, content)]
     if results:
-        messages.append({"role": "assistant", "content": json.dumps(results)})
-    request.session["messages"] = messages
+        turns.append(("assistant", results))
+    await append_turns(request.session, SYSTEM_PROMPT_VERSION, *turns)
+
+
+async def conversation_messages(request):
+    """
+    The message list for GPT-4o: the referenced system prompt followed by the logged turns, with the older
+    turns collapsed into a summary once the conversation outgrows CONVERSATION_TOKEN_BUDGET.
+    """
+    version, turns = await load_turns(request.session)
+    messages, _ = conversation_window(SYSTEM_PROMPTS.get(version, SYSTEM_MESSAGE), turns)
+    return messages
 
 def normalise_hyphenated_string(string):
     """
@@ -369,23 +635,25 @@ def normalise_hyphenated_string(string):
     """
     return unicodedata.normalize('NFKD', string).replace("–", "-").strip().lower()
 
-def ai_jsonify_string(string):
+async def ai_jsonify_string(string):
     """
     Converts a string to a JSON-compatible by asking OpenAI to do so.
     """
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {
-                "role": "user",
-                "content": f"""Convert this string to a JSON-compatible format which can be run in python. 
-                        Free text has the label 'response', list of choices has the label 'options' and product attributes has the label 'results'.
-                        Nothing else should be included in the JSON object: {string}
-                    """
-            }
-        ],
-        max_tokens=500,
-    )
+    with span("json_repair"):
+        response = await client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[
+                {
+                    "role": "user",
+                    "content": f"""Convert this string to a JSON-compatible format which can be run in python. 
+                            Free text has the label 'response', list of choices has the label 'options' and product attributes has the label 'results'.
+                            Nothing else should be included in the JSON object: {string}
+                        """
+                }
+            ],
+            max_tokens=500,
+            response_format={"type": "json_object"},
+        )
     content = response.choices[0].message.content
     try:
         return json.loads(content)